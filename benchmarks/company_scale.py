@@ -0,0 +1,267 @@
+"""Benchmark das operações da aplicação com uma empresa sintética.
+
+Gera registros no formato de ``employee_records.csv`` para N funcionários x
+M meses: marcações em torno do turno padrão com variação de alguns minutos,
+atrasos na entrada, esquecimentos de marcação, faltas, fins de semana e
+feriados sem expediente (pela escala de utils.shifts). Depois mede, no
+backend escolhido, as mesmas chamadas que a aplicação faz:
+
+- carregar todos os registros (frio e com cache) e os de uma matrícula;
+- montar a tabela do período (load_period + build_period_frame);
+- calculate_period_hours de um funcionário e de todos em um mês;
+- a folha do mês de todos os funcionários (month_payroll);
+- salvar um funcionário-mês (upsert + invalidação de caches e totais);
+- backup completo e incremental;
+- PDF de um funcionário e o ZIP de até ``--pdf-employees`` funcionários.
+
+Cada medição roda ``--repeat`` vezes; o resultado (mediana, mínimo, máximo
+e as rodadas, em ms) pode ser gravado em JSON e comparado com o de outra
+versão:
+
+    python benchmarks/company_scale.py --employees 200 --months 3 --json atual.json
+    python benchmarks/company_scale.py --employees 200 --months 3 --compare atual.json
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from utils.payroll import month_payroll, month_records  # noqa: E402
+from utils.punch_engine import MISSING, PUNCH_COLUMNS, build_period_frame, calculate_period_hours  # noqa: E402
+from utils.reports import build_report_pdf, build_reports_zip, report_jobs  # noqa: E402
+from utils.shifts import get_shift_registry  # noqa: E402
+from utils.storage import decode_records  # noqa: E402
+from utils.workspace import Workspace  # noqa: E402
+
+DEPARTMENTS = ['Administrativo', 'Comercial', 'Financeiro', 'Locação', 'Vendas']
+CARGOS = ['AUXILIAR ADMINISTRATIVO', 'CORRETOR', 'ASSISTENTE FINANCEIRO', 'GERENTE']
+
+# Variação das marcações (minutos) e probabilidades por dia útil
+PUNCH_JITTER = 4
+LATE_RATE = 0.08
+LATE_MINUTES = (10, 45)
+ABSENCE_RATE = 0.03
+MISSED_PUNCH_RATE = 0.01
+
+
+def employees_frame(employees, rng):
+    """Cadastro sintético: matrícula, nome, departamento, cargo e salário"""
+    ids = np.arange(1, employees + 1)
+    return pd.DataFrame({
+        'matricula': ids.astype(str),
+        'nome': [f"Funcionário {i}" for i in ids],
+        'departamento': np.array(DEPARTMENTS, dtype=object)[ids % len(DEPARTMENTS)],
+        'cargo': np.array(CARGOS, dtype=object)[rng.integers(0, len(CARGOS), len(ids))],
+        'salario_bruto': np.round(rng.uniform(1800, 9000, len(ids)), 2),
+    })
+
+
+def month_frame(staff, periodo_inicio, rng):
+    """Um mês de registros (horários em minutos) de todos os funcionários de ``staff``"""
+    periodo_fim = periodo_inicio + pd.offsets.MonthEnd(0)
+    schedule = get_shift_registry().compile(periodo_inicio, periodo_fim)
+    base = build_period_frame(periodo_inicio, periodo_fim, schedule=schedule)
+    days, employees = len(base), len(staff)
+
+    expected = np.tile(schedule.expected, (employees, 1))
+    work_day = np.tile(schedule.work_day, employees)
+    punches = expected + rng.integers(-PUNCH_JITTER, PUNCH_JITTER + 1, expected.shape)
+    late = rng.random(len(punches)) < LATE_RATE
+    punches[late, 0] += rng.integers(*LATE_MINUTES, int(late.sum()))
+    missed = rng.random(expected.shape) < MISSED_PUNCH_RATE
+    absent = rng.random(len(punches)) < ABSENCE_RATE
+    punches[missed | absent[:, None] | ~work_day[:, None]] = MISSING
+
+    frame = pd.DataFrame({
+        'Dia': np.tile(base['Dia'].to_numpy(), employees),
+        'Turno': np.tile(base['Turno'].to_numpy(), employees),
+    })
+    for i, col in enumerate(PUNCH_COLUMNS):
+        frame[col] = punches[:, i].astype(np.int16)
+    frame[['Horas', 'Observações']] = calculate_period_hours(frame, expected=expected)
+    for col in staff.columns:
+        frame[col] = np.repeat(staff[col].to_numpy(), days)
+    frame['periodo_inicio'] = periodo_inicio
+    frame['periodo_fim'] = periodo_fim
+    return frame
+
+
+def synthetic_records(employees, months, first_month, seed=0):
+    """Registros de ``employees`` funcionários em ``months`` meses, com horários em texto"""
+    rng = np.random.default_rng(seed)
+    staff = employees_frame(employees, rng)
+    frames = [month_frame(staff, pd.Timestamp(first_month) + pd.DateOffset(months=m), rng)
+              for m in range(months)]
+    return decode_records(pd.concat(frames, ignore_index=True))
+
+
+def measure(repeat, func, setup=None, warmup=False):
+    """Executa ``func`` ``repeat`` vezes (``setup`` antes de cada uma, fora da medição).
+
+    Com ``warmup``, uma execução extra não medida antes (caches e imports sob demanda).
+    """
+    if warmup:
+        func(*(setup(0) if setup else ()))
+    runs = []
+    for i in range(repeat):
+        args = setup(i) if setup else ()
+        start = time.perf_counter()
+        func(*args)
+        runs.append((time.perf_counter() - start) * 1000)
+    return {
+        'median_ms': round(statistics.median(runs), 2),
+        'min_ms': round(min(runs), 2),
+        'max_ms': round(max(runs), 2),
+        'runs_ms': [round(run, 2) for run in runs],
+    }
+
+
+def run_benchmarks(data_dir, backend, args):
+    results = {}
+    ultimo_mes = pd.Timestamp(args.first_month) + pd.DateOffset(months=args.months - 1)
+    ultimo_fim = ultimo_mes + pd.offsets.MonthEnd(0)
+    matricula = '1'
+
+    def bench(name, func, setup=None, repeat=None, warmup=False):
+        results[name] = measure(repeat or args.repeat, func, setup, warmup)
+        print(f"  {name:<40} {results[name]['median_ms']:>10.1f} ms")
+
+    workspace = Workspace(data_dir, backend)
+    bench("load_employee_data (frio)", lambda ws: ws.cache.load(),
+          setup=lambda i: (Workspace(data_dir, backend),))
+    bench("load_employee_data (cache)", lambda: workspace.cache.load(encoded=True), warmup=True)
+    bench("load_employee_data (matrícula, frio)", lambda ws: ws.cache.load(matricula),
+          setup=lambda i: (Workspace(data_dir, backend),))
+
+    def ponto_table():
+        existing = workspace.cache.load_period(matricula, ultimo_mes, ultimo_fim)
+        schedule = get_shift_registry().compile(ultimo_mes, ultimo_fim, matricula)
+        build_period_frame(ultimo_mes, ultimo_fim, existing, schedule)
+    bench("ponto_table (consulta do período)", ponto_table)
+
+    encoded = workspace.cache.load(encoded=True)
+    month = month_records(encoded, ultimo_mes)
+    schedule = get_shift_registry().compile(ultimo_mes, ultimo_fim)
+    one = month[month['matricula'].astype(str) == matricula]
+    bench("calculate_period_hours (1 funcionário)",
+          lambda: calculate_period_hours(one, expected=schedule.expected_for(one)))
+    bench("calculate_period_hours (todos, 1 mês)",
+          lambda: calculate_period_hours(month, expected=schedule.expected_for(month)))
+    bench("month_payroll (folha do mês)", lambda: month_payroll(month))
+
+    bench("create_backup (completo)", lambda: workspace.create_backup(full=True), repeat=1)
+
+    def edited_month(i):
+        # Um funcionário diferente a cada rodada, com uma observação alterada
+        target = str(i % args.employees + 1)
+        df = decode_records(month[month['matricula'].astype(str) == target].copy())
+        df['Observações'] = f"bench {i}"
+        return (df,)
+
+    def save(df):
+        workspace.records.upsert(df)
+        workspace.records_changed(df)
+    bench("save_employee_data", save, setup=edited_month)
+    bench("create_backup (incremental)", lambda: workspace.create_backup())
+
+    payroll = month_payroll(month)
+    jobs = report_jobs(month, payroll)
+    # O ReportLab é importado no primeiro PDF (ver benchmarks/startup.py)
+    bench("PDF (1 funcionário)", lambda: build_report_pdf(*jobs[0]), warmup=True)
+    sample = month[month['matricula'].astype(int) <= args.pdf_employees]
+    bench(f"PDF ZIP ({min(args.pdf_employees, args.employees)} funcionários)",
+          lambda: build_reports_zip(sample, payroll, max_workers=args.workers), repeat=1)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    print(f"\nComparação com {baseline_path} (mediana):")
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before:
+            print(f"  {name:<40} {'(novo)':>10}")
+            continue
+        ratio = result['median_ms'] / before['median_ms'] if before['median_ms'] else float('inf')
+        print(f"  {name:<40} {before['median_ms']:>10.1f} -> {result['median_ms']:>10.1f} ms  ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--employees', type=int, default=100)
+    parser.add_argument('--months', type=int, default=3)
+    parser.add_argument('--first-month', default='2025-01-01')
+    parser.add_argument('--backend', default='csv')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--pdf-employees', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=None, help="processos do ZIP de PDFs (padrão: CPUs)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=None, help="diretório de dados (padrão: temporário, apagado no final)")
+    parser.add_argument('--json', help="grava o resultado neste arquivo")
+    parser.add_argument('--compare', help="JSON de uma execução anterior para comparar")
+    args = parser.parse_args()
+
+    if args.data_dir:
+        run(Path(args.data_dir), args)
+    else:
+        with tempfile.TemporaryDirectory(prefix='company_scale_') as data_dir:
+            run(Path(data_dir), args)
+
+
+def run(data_dir, args):
+    started = time.perf_counter()
+    records = synthetic_records(args.employees, args.months, args.first_month, args.seed)
+    Workspace(data_dir, args.backend).records.save(records)
+    generation_s = time.perf_counter() - started
+    print(f"{args.employees} funcionários x {args.months} meses ({args.backend}): {len(records)} linhas "
+          f"geradas e gravadas em {generation_s:.1f}s ({data_dir})")
+
+    results = run_benchmarks(data_dir, args.backend, args)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'meta': {
+                    'timestamp': datetime.now().isoformat(timespec='seconds'),
+                    'git_revision': git_revision(),
+                    'python': platform.python_version(),
+                    'pandas': pd.__version__,
+                    'numpy': np.__version__,
+                    'employees': args.employees,
+                    'months': args.months,
+                    'rows': len(records),
+                    'backend': args.backend,
+                    'repeat': args.repeat,
+                    'seed': args.seed,
+                    'generation_s': round(generation_s, 2),
+                },
+                'results': results,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"Resultado gravado em {args.json}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""Custo de inicialização: tempo de importação da aplicação em processos novos.
+
+Cada rodada importa o módulo em um interpretador novo com ``-X importtime``
+(como num cold start do container) e mede o tempo total. Mostra a mediana,
+os módulos mais caros da última rodada e confere se os módulos pesados que
+só devem ser carregados sob demanda (ReportLab, PIL) ficaram de fora.
+
+    python benchmarks/startup.py [--module app] [--rounds 5] [--top 15] [--json resultado.json]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+# Carregados apenas quando um PDF é gerado (utils.reports)
+DEFERRED_MODULES = ['reportlab', 'PIL']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def import_profile(module):
+    """Importa ``module`` em um processo novo; retorna (segundos, adiados carregados, importtime)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(module=module, deferred=DEFERRED_MODULES)],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    return probe['seconds'], probe['loaded'], parse_importtime(result.stderr, module)
+
+
+def parse_importtime(stderr, module):
+    """Dependências diretas de ``module`` no ``-X importtime``: ``[(nome, acumulado_us)]``.
+
+    Na saída, cada módulo aparece depois dos que ele importa, um nível de
+    indentação abaixo.
+    """
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        level = (len(name) - len(name.lstrip())) // 2
+        if level == 1:
+            children.append((name.strip(), int(cumulative_us)))
+        elif level == 0:
+            if name.strip() == module:
+                return children
+            children = []
+    return children
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--json', help="grava o resultado neste arquivo")
+    args = parser.parse_args()
+
+    timings = []
+    for _ in range(args.rounds):
+        seconds, loaded, children = import_profile(args.module)
+        timings.append(seconds)
+
+    median = statistics.median(timings)
+    print(f"import {args.module}: mediana {median * 1000:.0f} ms "
+          f"(mín {min(timings) * 1000:.0f} ms, máx {max(timings) * 1000:.0f} ms, {args.rounds} rodadas)")
+    print("\nMódulos mais caros (acumulado, última rodada):")
+    heaviest = sorted(children, key=lambda item: item[1], reverse=True)[:args.top]
+    for name, cumulative in heaviest:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+    if loaded:
+        print(f"\nATENÇÃO: carregados na inicialização: {', '.join(loaded)}")
+    else:
+        print(f"\nNão carregados na inicialização: {', '.join(DEFERRED_MODULES)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'module': args.module,
+                'rounds': args.rounds,
+                'median_ms': round(median * 1000, 1),
+                'timings_ms': [round(t * 1000, 1) for t in timings],
+                'deferred_loaded': loaded,
+                'top_modules_ms': {name: round(cumulative / 1000, 1) for name, cumulative in heaviest},
+            }, f, indent=2)
+    # Código de saída 1 quando um módulo adiado volta a ser importado no início
+    sys.exit(1 if loaded else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Teste de carga: N processos gravando registros ao mesmo tempo.
+
+Cada processo grava repetidamente o mês de um funcionário próprio e edita
+um dia próprio de um funcionário compartilhado por todos (mesmo período,
+linhas diferentes), compactando o diário de vez em quando. Como a tela de
+ponto, a edição carrega o mês do funcionário compartilhado, altera o seu dia
+e grava o mês inteiro, passando as linhas carregadas para o ``upsert``. No
+final, confere se a última gravação de cada processo está nos registros:
+qualquer linha perdida é uma atualização perdida.
+
+Com ``--two-way`` o ``upsert`` compara só com o que está gravado (sem as
+linhas carregadas): gravações do mês inteiro desfazem as de outros processos.
+
+    python benchmarks/stress_writers.py --processes 8 --rounds 20 --backend csv
+"""
+import argparse
+import multiprocessing
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pandas as pd  # noqa: E402
+
+from utils.punch_engine import build_period_frame  # noqa: E402
+from utils.storage import get_record_store  # noqa: E402
+
+PERIODO_INICIO = pd.Timestamp('2025-06-01')
+PERIODO_FIM = pd.Timestamp('2025-06-30')
+SHARED_MATRICULA = 'compartilhado'
+
+
+def employee_frame(matricula, marker=None, existing=None):
+    """Mês do funcionário no formato salvo pela tela (``marker`` em todas as observações)"""
+    frame = build_period_frame(PERIODO_INICIO, PERIODO_FIM, existing)
+    if marker is not None:
+        frame['Observações'] = marker
+    frame['matricula'] = matricula
+    frame['nome'] = f"Funcionário {matricula}"
+    frame['departamento'] = 'Geral'
+    frame['cargo'] = 'AUXILIAR ADMINISTRATIVO'
+    frame['salario_bruto'] = 3000.0
+    frame['periodo_inicio'] = PERIODO_INICIO
+    frame['periodo_fim'] = PERIODO_FIM
+    return frame
+
+
+def edit_shared_day(store, worker, marker, two_way):
+    """Como a tela: carrega o mês compartilhado, altera um dia e grava o mês inteiro"""
+    existing = store.load_period(SHARED_MATRICULA, PERIODO_INICIO, PERIODO_FIM) if store.exists() else None
+    loaded = employee_frame(SHARED_MATRICULA, existing=existing)
+    edited = loaded.copy()
+    edited.loc[worker, 'Observações'] = marker
+    store.upsert(edited, None if two_way else loaded)
+
+
+def writer(data_dir, backend, worker, rounds, compact_every, two_way):
+    store = get_record_store(data_dir, backend)
+    for round_ in range(rounds):
+        marker = f"w{worker}-r{round_}"
+        store.upsert(employee_frame(f"w{worker}", marker))
+        edit_shared_day(store, worker, marker, two_way)
+        if compact_every and round_ % compact_every == compact_every - 1:
+            store.compact()
+
+
+def lost_updates(records, processes, rounds):
+    last = f"r{rounds - 1}"
+    lost = 0
+    for worker in range(processes):
+        expected = f"w{worker}-{last}"
+        own = records[records['matricula'] == f"w{worker}"]
+        lost += int((own['Observações'] != expected).sum()) + max(0, 30 - len(own))
+        shared = records[(records['matricula'] == SHARED_MATRICULA) & (records['Observações'] == expected)]
+        lost += 0 if len(shared) == 1 else 1
+    return lost
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--processes', type=int, default=8)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--backend', default='csv')
+    parser.add_argument('--compact-every', type=int, default=5)
+    parser.add_argument('--data-dir', default=None)
+    parser.add_argument('--two-way', action='store_true',
+                        help="grava sem as linhas carregadas (só compara com o gravado)")
+    args = parser.parse_args()
+    if args.processes > 30:
+        parser.error("no máximo 30 processos (um dia do mês compartilhado por processo)")
+
+    data_dir = Path(args.data_dir or tempfile.mkdtemp(prefix='stress_writers_'))
+    started = time.perf_counter()
+    processes = [
+        multiprocessing.Process(target=writer, args=(data_dir, args.backend, worker,
+                                                     args.rounds, args.compact_every, args.two_way))
+        for worker in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    failed = sum(1 for process in processes if process.exitcode != 0)
+    records = get_record_store(data_dir, args.backend).load()
+    lost = lost_updates(records, args.processes, args.rounds)
+    writes = args.processes * args.rounds * 2
+    print(f"{args.processes} processos x {args.rounds} rodadas ({args.backend}): "
+          f"{writes} gravações em {elapsed:.1f}s ({writes / elapsed:.1f}/s), "
+          f"{lost} atualizações perdidas, {failed} processos com erro")
+    sys.exit(1 if lost or failed else 0)
+
+
+if __name__ == "__main__":
+    main()
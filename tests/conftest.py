@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+# Os testes importam os módulos de utils a partir da raiz do repositório
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.punch_engine import build_period_frame  # noqa: E402
+
+PERIODO_INICIO = pd.Timestamp('2025-06-01')
+PERIODO_FIM = pd.Timestamp('2025-06-30')
+
+
+def employee_month(matricula, periodo_inicio=PERIODO_INICIO, periodo_fim=None, existing=None):
+    """Mês do funcionário no formato salvo pela tela (``existing``: registros já gravados do período)"""
+    if periodo_fim is None:
+        periodo_fim = periodo_inicio + pd.offsets.MonthEnd(0)
+    frame = build_period_frame(periodo_inicio, periodo_fim, existing)
+    frame['matricula'] = str(matricula)
+    frame['nome'] = f"Funcionário {matricula}"
+    frame['departamento'] = 'Geral'
+    frame['cargo'] = 'AUXILIAR ADMINISTRATIVO'
+    frame['salario_bruto'] = 3000.0
+    frame['periodo_inicio'] = periodo_inicio
+    frame['periodo_fim'] = periodo_fim
+    return frame
@@ -0,0 +1,53 @@
+"""Backups incrementais contra o snapshot completo dos mesmos registros."""
+import pandas as pd
+import pytest
+
+from conftest import employee_month
+from utils.workspace import Workspace
+
+
+def save(workspace, df):
+    workspace.records.upsert(df)
+    workspace.records_changed(df)
+
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def workspace(request, tmp_path):
+    workspace = Workspace(tmp_path, request.param)
+    save(workspace, pd.concat([
+        employee_month(matricula, pd.Timestamp(inicio))
+        for matricula in ['1', '2', '10'] for inicio in ['2025-05-01', '2025-06-01']
+    ], ignore_index=True))
+    return workspace
+
+
+def test_incremental_snapshot_equals_full_snapshot(workspace):
+    first = workspace.create_backup()
+    assert first['new_chunks'] == 6
+    assert workspace.backups.pending_changes().last_id == 0
+
+    edited = employee_month('2')
+    edited.loc[3, 'Ent. 1'] = "7:10"
+    edited['horas_extras'] = 2.0
+    save(workspace, edited)
+    save(workspace, employee_month('3'))
+
+    incremental = workspace.create_backup()
+    assert incremental['new_chunks'] == 2
+    full = workspace.create_backup(full=True)
+    assert full['new_chunks'] == 0
+    assert (incremental['checksum'], incremental['rows']) == (full['checksum'], full['rows'])
+    pd.testing.assert_frame_equal(workspace.backups.load(incremental['id']), workspace.backups.load(full['id']))
+    assert workspace.backups.load_period(incremental['id'], '2', '2025-06-01', '2025-06-30')['Ent. 1'].iloc[3] == "07:10"
+
+
+def test_restore_makes_the_next_snapshot_full(workspace):
+    first = workspace.create_backup()
+    save(workspace, employee_month('3'))
+    workspace.create_backup()
+
+    workspace.restore(first['id'])
+    assert workspace.backups.pending_changes().full
+    snapshot = workspace.create_backup()
+    assert snapshot['checksum'] == first['checksum']
+    assert not workspace.backups.pending_changes().full
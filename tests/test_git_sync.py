@@ -0,0 +1,146 @@
+"""GitSyncWorker contra um repositório bare local (sem GitHub)."""
+import subprocess
+
+import pytest
+
+from utils.git_sync import GitSyncWorker
+
+
+def git(*args, cwd=None):
+    return subprocess.run(
+        ['git', '-c', 'user.name=Teste', '-c', 'user.email=teste@example.com', *args],
+        cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout
+
+
+@pytest.fixture
+def repos(tmp_path):
+    """Remoto bare com um commit e um clone de trabalho com data/employee_records.csv versionado"""
+    remote = tmp_path / "remote.git"
+    work = tmp_path / "work"
+    git('init', '--bare', '-b', 'main', str(remote))
+    git('clone', str(remote), str(work))
+    (work / "data").mkdir()
+    (work / "data" / "employee_records.csv").write_text("matricula\n1\n")
+    git('add', '.', cwd=work)
+    git('commit', '-m', 'inicial', cwd=work)
+    git('push', 'origin', 'HEAD:main', cwd=work)
+    return remote, work
+
+
+@pytest.fixture
+def worker(repos):
+    remote, work = repos
+    worker = GitSyncWorker(work, str(remote), coalesce_delay=0.1, max_retries=2, backoff=0.05)
+    worker.start()
+    yield worker
+    worker.stop()
+
+
+def remote_files(remote):
+    return git('ls-tree', '-r', '--name-only', 'main', cwd=remote).split()
+
+
+def test_sync_pushes_coalesced_backups(repos, worker):
+    remote, work = repos
+    for i in range(3):
+        path = work / f"backup_{i}.csv"
+        path.write_text(str(i))
+        worker.enqueue(path, f"Backup {i}")
+
+    assert worker.flush(30)
+    status = worker.status()
+    assert status['state'] == 'idle', status['last_error']
+    assert {f"backup_{i}.csv" for i in range(3)} <= set(remote_files(remote))
+
+
+def test_sync_with_rewritten_tracked_records(repos, worker):
+    # Compactação e restauração regravam o CSV versionado sem adicioná-lo ao índice
+    remote, work = repos
+    records = work / "data" / "employee_records.csv"
+    records.write_text("matricula\n1\n2\n")
+
+    for i in range(2):
+        backup = work / f"backup_{i}.csv"
+        backup.write_text(str(i))
+        worker.enqueue(backup, f"Backup {i}")
+        assert worker.flush(30)
+        status = worker.status()
+        assert status['state'] == 'idle', status['last_error']
+
+    assert {"backup_0.csv", "backup_1.csv"} <= set(remote_files(remote))
+    # A alteração local continua no disco e fora do commit
+    assert records.read_text() == "matricula\n1\n2\n"
+    assert git('show', 'main:data/employee_records.csv', cwd=remote) == "matricula\n1\n"
+
+
+def test_sync_rebases_on_remote_changes(repos, tmp_path, worker):
+    remote, work = repos
+    other = tmp_path / "other"
+    git('clone', str(remote), str(other))
+    (other / "outro.csv").write_text("x")
+    git('add', '.', cwd=other)
+    git('commit', '-m', 'outro', cwd=other)
+    git('push', 'origin', 'HEAD:main', cwd=other)
+
+    (work / "data" / "employee_records.csv").write_text("matricula\n3\n")
+    backup = work / "backup.csv"
+    backup.write_text("b")
+    worker.enqueue(backup, "Backup")
+    assert worker.flush(30)
+    assert worker.status()['state'] == 'idle', worker.status()['last_error']
+    assert {"outro.csv", "backup.csv"} <= set(remote_files(remote))
+
+
+def test_unreachable_remote_fails_after_retries(repos):
+    _, work = repos
+    worker = GitSyncWorker(work, str(work.parent / "inexistente.git"),
+                           coalesce_delay=0.05, max_retries=2, backoff=0.05)
+    worker.start()
+    try:
+        backup = work / "backup.csv"
+        backup.write_text("b")
+        worker.enqueue(backup, "Backup")
+        assert worker.flush(30)
+        status = worker.status()
+        assert status['state'] == 'failed'
+        assert status['last_error']
+    finally:
+        worker.stop()
+
+
+def test_conflicting_catalogs_abort_the_rebase(repos, tmp_path):
+    # Cada instância grava o seu backups/catalog.sqlite3 (binário): o pull --rebase conflita
+    remote, work = repos
+    other = tmp_path / "other"
+    git('clone', str(remote), str(other))
+    (other / "backups").mkdir()
+    (other / "backups" / "catalog.sqlite3").write_bytes(b"\x00outra instancia\xff")
+    git('add', '.', cwd=other)
+    git('commit', '-m', 'catálogo da outra instância', cwd=other)
+    git('push', 'origin', 'HEAD:main', cwd=other)
+
+    records = work / "data" / "employee_records.csv"
+    records.write_text("matricula\n1\n4\n")
+    catalog = work / "backups" / "catalog.sqlite3"
+    catalog.parent.mkdir()
+    catalog.write_bytes(b"\x00esta instancia\xff")
+
+    worker = GitSyncWorker(work, str(remote), coalesce_delay=0.05, max_retries=2, backoff=0.05)
+    worker.start()
+    try:
+        worker.enqueue(catalog, "Backup")
+        assert worker.flush(30)
+        status = worker.status()
+        assert status['state'] == 'failed'
+        assert 'pull' in status['last_error']
+    finally:
+        worker.stop()
+
+    # Fora do rebase, com o catálogo local e a alteração não versionada de volta
+    assert not (work / ".git" / "rebase-merge").exists()
+    assert not (work / ".git" / "rebase-apply").exists()
+    assert git('status', '--porcelain', '--untracked-files=no', cwd=work).strip() == "M data/employee_records.csv"
+    assert catalog.read_bytes() == b"\x00esta instancia\xff"
+    assert records.read_text() == "matricula\n1\n4\n"
+    assert git('stash', 'list', cwd=work) == ""
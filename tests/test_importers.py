@@ -0,0 +1,39 @@
+"""Importação de marcações: fins de semana e a tela de ponto."""
+from conftest import PERIODO_FIM, PERIODO_INICIO, employee_month
+from utils.importers import import_punches
+from utils.storage import get_record_store
+
+# 07/06/2025 é um sábado
+PUNCHES = """matricula;data;hora
+7;06/06/2025;07:12
+7;06/06/2025;10:30
+7;06/06/2025;12:00
+7;06/06/2025;17:30
+7;07/06/2025;08:00
+7;07/06/2025;12:00
+7;07/06/2025;13:00
+7;07/06/2025;15:00
+"""
+
+
+def test_weekend_punches_are_flagged_and_survive_ui_save(tmp_path):
+    store = get_record_store(tmp_path, 'csv')
+    store.save(employee_month('7').head(1))
+    source = tmp_path / "marcacoes.csv"
+    source.write_text(PUNCHES, encoding='utf-8')
+
+    summary = import_punches(source, store)
+    assert (summary['dias'], summary['fora_da_escala']) == (2, 1)
+
+    # A tela mostra o sábado trabalhado...
+    loaded = employee_month('7', existing=store.load_period('7', PERIODO_INICIO, PERIODO_FIM))
+    saturday = loaded[loaded['Dia'] == "07/06 SÁB"].iloc[0]
+    assert (saturday['Ent. 1'], saturday['Saí. 2'], saturday['Horas']) == ("08:00", "15:00", "06:00")
+    assert saturday['Observações'] == "Horas extras (06:00)"
+
+    # ...e salvar outro dia não o apaga
+    edited = loaded.copy()
+    edited.loc[edited['Dia'] == "09/06 SEG", 'Ent. 1'] = "07:15"
+    store.upsert(edited, loaded)
+    records = store.load_period('7', PERIODO_INICIO, PERIODO_FIM)
+    assert records.loc[records['Dia'] == "07/06 SÁB", 'Ent. 1'].tolist() == ["08:00"]
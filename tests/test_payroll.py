@@ -0,0 +1,117 @@
+"""Folha em lote contra o cálculo de um funcionário e as faixas de tax_tables.json."""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import tax_tables
+from utils.payroll import calculate_payroll, calculate_salary, calculate_taxes, calculate_taxes_batch
+from utils.tax_tables import get_tax_table
+
+# Limites das faixas de 2023 e os centavos em volta deles
+INSS_LIMITS = [1320.00, 2571.29, 3856.94, 7507.49]
+IRRF_LIMITS = [1903.98, 2826.65, 3751.05, 4664.68]
+
+
+def around(limits):
+    return [value + delta for value in limits for delta in (-0.01, -0.005, 0.0, 0.005, 0.01)]
+
+
+@pytest.fixture
+def tax_file(tmp_path, monkeypatch):
+    """Troca tax_tables.json por ``tables`` (ano -> tabela) durante o teste"""
+    def write(tables):
+        path = tmp_path / "tax_tables.json"
+        path.write_text(json.dumps({str(year): table for year, table in tables.items()}), encoding='utf-8')
+        monkeypatch.setattr(tax_tables, 'TAX_TABLES_FILE', path)
+        tax_tables._load_config.cache_clear()
+        tax_tables._compiled.cache_clear()
+    yield write
+    tax_tables._load_config.cache_clear()
+    tax_tables._compiled.cache_clear()
+
+
+def test_batch_taxes_match_scalar():
+    rng = np.random.default_rng(0)
+    salarios = np.concatenate([rng.uniform(0, 15000, 5000).round(2), around(INSS_LIMITS), around(IRRF_LIMITS)])
+    dependentes = rng.integers(0, 4, len(salarios))
+
+    inss, irrf = calculate_taxes_batch(salarios, dependentes, 2023)
+    expected = [calculate_taxes(s, d, 2023) for s, d in zip(salarios, dependentes)]
+    np.testing.assert_allclose(inss, [t['inss'] for t in expected], rtol=0, atol=1e-9)
+    np.testing.assert_allclose(irrf, [t['irrf'] for t in expected], rtol=0, atol=1e-9)
+
+
+def test_batch_payroll_matches_calculate_salary():
+    rng = np.random.default_rng(1)
+    employees = pd.DataFrame({
+        'salario_bruto': rng.uniform(1000, 12000, 500).round(2),
+        'dias_trabalhados': rng.integers(0, 23, 500),
+        'horas_extras': rng.uniform(0, 20, 500).round(1),
+        'adicional_noturno': rng.uniform(0, 300, 500).round(2),
+        'outros_beneficios': rng.uniform(0, 500, 500).round(2),
+        'outros_descontos': rng.uniform(0, 200, 500).round(2),
+        'dependentes': rng.integers(0, 4, 500),
+        'ano': 2023,
+    })
+    batch = calculate_payroll(employees)
+    for i, row in employees.iterrows():
+        scalar = calculate_salary(
+            row['salario_bruto'], row['dias_trabalhados'], row['horas_extras'], row['adicional_noturno'],
+            row['outros_beneficios'], row['outros_descontos'], int(row['dependentes']), ano=2023
+        )
+        for key, value in scalar.items():
+            assert batch.at[i, key] == pytest.approx(value, abs=1e-9), (i, key)
+
+
+@pytest.mark.parametrize('salario, inss', [
+    (1320.00, 99.00),
+    # Sem buraco entre as faixas: 1320.005 é da segunda faixa, e não do teto
+    (1320.005, 99.00 + 0.005 * 0.09),
+    (2571.29, 99.00 + 1251.29 * 0.09),
+    (2571.30, 211.62 + 0.01 * 0.12),
+    (3856.94, 211.62 + 1285.65 * 0.12),
+    (7507.49, 365.90 + 3650.55 * 0.14),
+    # Acima da última faixa: o teto, soma das faixas arredondadas em centavos
+    (7507.50, 876.98),
+    (50000.00, 876.98),
+])
+def test_inss_bracket_boundaries(salario, inss):
+    tabela = get_tax_table(2023)
+    assert tabela.inss(salario) == pytest.approx(inss, abs=1e-9)
+    assert tabela.inss_batch([salario])[0] == pytest.approx(inss, abs=1e-9)
+
+
+@pytest.mark.parametrize('base, irrf', [
+    (1903.98, 0.0),
+    (1903.99, 0.0),
+    (2826.65, 2826.65 * 0.075 - 142.80),
+    (2826.66, 2826.66 * 0.15 - 354.80),
+    (4664.68, 4664.68 * 0.225 - 636.13),
+    (4664.69, 4664.69 * 0.275 - 869.36),
+])
+def test_irrf_bracket_boundaries(base, irrf):
+    tabela = get_tax_table(2023)
+    assert tabela.irrf(base) == pytest.approx(irrf, abs=1e-9)
+    assert tabela.irrf_batch([base])[0] == pytest.approx(irrf, abs=1e-9)
+
+
+def test_year_lookup_with_missing_and_extra_years(tax_file):
+    with open(tax_tables.TAX_TABLES_FILE, encoding='utf-8') as f:
+        table_2023 = json.load(f)['2023']
+    table_2025 = json.loads(json.dumps(table_2023))
+    table_2025['inss']['faixas'][0]['ate'] = 1518.00
+    # 2024 ausente: vale a tabela anterior; 2025 é um ano a mais no arquivo
+    tax_file({2023: table_2023, 2025: table_2025})
+
+    assert get_tax_table(2022).year == 2023
+    assert get_tax_table(2024).year == 2023
+    assert get_tax_table(2025).year == 2025
+    assert get_tax_table(2030).year == 2025
+    assert get_tax_table().year == 2025
+
+    inss, _ = calculate_taxes_batch([1500.0, 1500.0, 1500.0], 0, np.array([2024, 2025, None], dtype=object))
+    assert inss.tolist() == pytest.approx([calculate_taxes(1500.0, 0, 2024)['inss'],
+                                          1500.0 * 0.075, 1500.0 * 0.075])
+    assert inss[0] == pytest.approx(99.00 + 180.0 * 0.09)
@@ -0,0 +1,183 @@
+"""O motor vetorizado deve reproduzir o cálculo linha a linha original.
+
+``legacy_calculate_day_hours`` é a cópia literal de ``calculate_day_hours`` do
+app.py original (com calculate_worked_hours, validate_time e as conversões
+de que ela dependia). A jornada esperada era fixa em 8:48; hoje ela vem do
+turno (utils.shifts), e para o turno padrão as duas coincidem, por isso as
+linhas geradas usam DEFAULT_SHIFT.
+"""
+import random
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.punch_engine import DEFAULT_SHIFT, PUNCH_COLUMNS, calculate_period_hours, punch_minutes, shift_minutes
+
+
+def legacy_calculate_worked_hours(ent1, sai1, ent2, sai2):
+    times = [ent1, sai1, ent2, sai2]
+    if any(not t or t == "--:--" for t in times):
+        return "00:00"
+
+    try:
+        def to_minutes(time_str):
+            h, m = map(int, time_str.split(':'))
+            return h * 60 + m
+
+        total_minutes = (to_minutes(sai1) - to_minutes(ent1)) + (to_minutes(sai2) - to_minutes(ent2))
+        hours, minutes = divmod(total_minutes, 60)
+        return f"{hours:02d}:{minutes:02d}"
+    except Exception:
+        return "00:00"
+
+
+def legacy_validate_time(time_str):
+    if not time_str or time_str in ["--:--", ""]:
+        return None
+    return re.match(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$', time_str)
+
+
+def legacy_time_to_minutes(time_str):
+    h, m = map(int, time_str.split(':'))
+    return h * 60 + m
+
+
+def legacy_minutes_to_time(minutes):
+    h = minutes // 60
+    m = minutes % 60
+    return f"{h:02d}:{m:02d}"
+
+
+def legacy_calculate_day_hours(row):
+    turno_parts = row['Turno'].split()
+    expected = {
+        'ent1': turno_parts[0] if len(turno_parts) > 0 and turno_parts[0] != "--:--" else None,
+        'sai1': turno_parts[1] if len(turno_parts) > 1 and turno_parts[1] != "--:--" else None,
+        'ent2': turno_parts[2] if len(turno_parts) > 2 and turno_parts[2] != "--:--" else None,
+        'sai2': turno_parts[3] if len(turno_parts) > 3 and turno_parts[3] != "--:--" else None
+    }
+
+    registrado = {
+        'ent1': row['Ent. 1'] if legacy_validate_time(row['Ent. 1']) else None,
+        'sai1': row['Saí. 1'] if legacy_validate_time(row['Saí. 1']) else None,
+        'ent2': row['Ent. 2'] if legacy_validate_time(row['Ent. 2']) else None,
+        'sai2': row['Saí. 2'] if legacy_validate_time(row['Saí. 2']) else None
+    }
+
+    horas_trabalhadas = legacy_calculate_worked_hours(
+        registrado['ent1'], registrado['sai1'],
+        registrado['ent2'], registrado['sai2']
+    )
+
+    observacoes = []
+
+    if expected['ent1'] and registrado['ent1']:
+        expected_min = legacy_time_to_minutes(expected['ent1'])
+        registered_min = legacy_time_to_minutes(registrado['ent1'])
+        if registered_min > expected_min:
+            atraso = registered_min - expected_min
+            observacoes.append(f"Entrada atrasada ({legacy_minutes_to_time(atraso)})")
+
+    if expected['sai1'] and registrado['sai1']:
+        expected_min = legacy_time_to_minutes(expected['sai1'])
+        registered_min = legacy_time_to_minutes(registrado['sai1'])
+        if registered_min < expected_min:
+            antecipacao = expected_min - registered_min
+            observacoes.append(f"Saída antecipada ({legacy_minutes_to_time(antecipacao)})")
+
+    if expected['ent2'] and registrado['ent2']:
+        expected_min = legacy_time_to_minutes(expected['ent2'])
+        registered_min = legacy_time_to_minutes(registrado['ent2'])
+        if registered_min > expected_min:
+            atraso = registered_min - expected_min
+            observacoes.append(f"Retorno atrasado ({legacy_minutes_to_time(atraso)})")
+
+    if expected['sai2'] and registrado['sai2']:
+        expected_min = legacy_time_to_minutes(expected['sai2'])
+        registered_min = legacy_time_to_minutes(registrado['sai2'])
+        if registered_min < expected_min:
+            antecipacao = expected_min - registered_min
+            observacoes.append(f"Saída final antecipada ({legacy_minutes_to_time(antecipacao)})")
+
+    if all([registrado['ent1'], registrado['sai2']]):
+        total_esperado = 8 * 60 + 48
+        total_registrado = legacy_time_to_minutes(horas_trabalhadas)
+
+        if total_registrado > total_esperado:
+            extra = total_registrado - total_esperado
+            observacoes.append(f"Horas extras ({legacy_minutes_to_time(extra)})")
+        elif total_registrado < total_esperado:
+            falta = total_esperado - total_registrado
+            observacoes.append(f"Horas faltantes ({legacy_minutes_to_time(falta)})")
+
+    return horas_trabalhadas, ", ".join(observacoes) if observacoes else ""
+
+
+# Marcações inválidas ou ausentes que aparecem na tela e nos CSVs antigos
+INVALID_PUNCHES = ["--:--", "", None, "24:00", "12:5", "ab", "7h30", "-1:00", "12:60"]
+
+
+def random_punch(rng):
+    return f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}"
+
+
+def generated_rows(count, seed=0):
+    """Dias completos, parciais, com marcações inválidas e que viram a meia-noite"""
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        kind = rng.choice(['normal', 'partial', 'invalid', 'overnight', 'random'])
+        if kind == 'overnight':
+            punches = ["22:00", f"{rng.randint(0, 2):02d}:{rng.randint(0, 59):02d}",
+                       "03:00", f"{rng.randint(5, 7):02d}:{rng.randint(0, 59):02d}"]
+        elif kind == 'random':
+            punches = [random_punch(rng) for _ in PUNCH_COLUMNS]
+        else:
+            punches = [f"{h:02d}:{max(0, min(59, m + rng.randint(-20, 20))):02d}"
+                       for h, m in [(7, 12), (10, 30), (12, 0), (17, 30)]]
+            if rng.random() < 0.3:
+                punches[0] = f"{rng.randint(0, 9)}:{rng.randint(0, 59):02d}"  # hora com um dígito
+            if kind == 'partial':
+                for i in rng.sample(range(4), rng.randint(1, 3)):
+                    punches[i] = rng.choice(["--:--", ""])
+            elif kind == 'invalid':
+                punches[rng.randrange(4)] = rng.choice(INVALID_PUNCHES)
+        rows.append(dict(zip(PUNCH_COLUMNS, punches), Turno=DEFAULT_SHIFT))
+    return pd.DataFrame(rows, columns=['Turno', *PUNCH_COLUMNS], dtype=object)
+
+
+def assert_matches_legacy(df, result):
+    # Dicionários, e não iterrows: no pandas 3 a linha vira string e None vira NaN
+    rows = df.to_dict('records')
+    expected = [legacy_calculate_day_hours(row) for row in rows]
+    mismatches = [
+        (row, legacy, (result.at[i, 'Horas'], result.at[i, 'Observações']))
+        for i, row, legacy in zip(df.index, rows, expected)
+        if legacy != (result.at[i, 'Horas'], result.at[i, 'Observações'])
+    ]
+    assert not mismatches, mismatches[:5]
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_matches_legacy_row_by_row(seed):
+    df = generated_rows(3000, seed)
+    assert_matches_legacy(df, calculate_period_hours(df))
+
+
+def test_matches_legacy_with_minutes_and_expected_matrix():
+    # Mesmo resultado com os horários já em minutos e a escala compilada
+    df = generated_rows(2000, seed=3)
+    encoded = df.copy()
+    for col in PUNCH_COLUMNS:
+        encoded[col] = punch_minutes(df[col]).astype(np.int16)
+    result = calculate_period_hours(encoded, expected=shift_minutes(df['Turno']))
+    assert_matches_legacy(df, result)
+
+
+def test_empty_frame():
+    df = generated_rows(0)
+    result = calculate_period_hours(df)
+    assert list(result.columns) == ['Horas', 'Observações']
+    assert result.empty
@@ -0,0 +1,52 @@
+"""Totais do painel com gravações que chegam fora de ordem."""
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from conftest import employee_month
+from utils.workspace import Workspace
+
+
+def worked(hours):
+    # Um dia útil (02/06/2025) com ``hours`` trabalhadas
+    frame = employee_month('124')
+    frame.loc[1, ['Ent. 1', 'Saí. 1', 'Horas']] = ["08:00", f"{8 + hours:02d}:00", f"{hours:02d}:00"]
+    return frame
+
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def workspace(request, tmp_path):
+    workspace = Workspace(tmp_path, request.param)
+    workspace.records.upsert(employee_month('124'))
+    workspace.load_rollups()
+    return workspace
+
+
+def test_late_update_of_an_older_save_keeps_the_newest_totals(workspace):
+    older, newer = worked(4), worked(8)
+    workspace.records.upsert(older)
+    # A sessão que gravou primeiro espera pelo lock dos totais enquanto outra grava e atualiza
+    with workspace.rollups._lock:
+        late = threading.Thread(target=workspace.records_changed, args=(older,))
+        late.start()
+        time.sleep(0.2)
+        workspace.records.upsert(newer)
+        workspace.records_changed(newer)
+    late.join()
+
+    periods = workspace.rollups.load_periods()
+    assert periods['minutos_trabalhados'].tolist() == [480]
+    departments = workspace.load_rollups()
+    assert departments[['funcionarios', 'minutos_trabalhados']].values.tolist() == [[1, 480]]
+
+    workspace.rollups.invalidate()
+    pd.testing.assert_frame_equal(workspace.load_rollups(), departments)
+
+
+def test_period_without_records_leaves_the_totals(workspace):
+    keys = employee_month('124').head(1)
+    workspace.rollups.update(keys, lambda *key: pd.DataFrame())
+    assert workspace.rollups.load_periods().empty
+    assert workspace.load_rollups().empty
@@ -0,0 +1,86 @@
+"""Gravação concorrente do mês inteiro (como a tela de ponto) nos backends."""
+import pandas as pd
+import pytest
+
+from conftest import PERIODO_FIM, PERIODO_INICIO, employee_month
+from utils.storage import get_record_store
+
+
+def loaded_month(store):
+    return employee_month('124', existing=store.load_period('124', PERIODO_INICIO, PERIODO_FIM))
+
+
+def day(store, index):
+    records = store.load_period('124', PERIODO_INICIO, PERIODO_FIM)
+    return records[records['Dia'].str[:2] == f"{index + 1:02d}"].iloc[0]
+
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def store(request, tmp_path):
+    store = get_record_store(tmp_path, request.param)
+    store.save(employee_month('124'))
+    return store
+
+
+def test_sessions_editing_different_days_keep_both(store):
+    # Duas sessões abrem o mesmo mês antes de qualquer uma salvar
+    loaded_a, loaded_b = loaded_month(store), loaded_month(store)
+    edited_a, edited_b = loaded_a.copy(), loaded_b.copy()
+    edited_a.loc[2, 'Ent. 1'] = "07:10"
+    edited_b.loc[3, 'Ent. 1'] = "07:20"
+
+    assert store.upsert(edited_a, loaded_a) == 1
+    assert store.upsert(edited_b, loaded_b) == 1
+    assert day(store, 2)['Ent. 1'] == "07:10"
+    assert day(store, 3)['Ent. 1'] == "07:20"
+
+
+def test_same_cell_last_save_wins(store):
+    loaded_a, loaded_b = loaded_month(store), loaded_month(store)
+    edited_a, edited_b = loaded_a.copy(), loaded_b.copy()
+    edited_a.loc[2, 'Ent. 1'] = "07:10"
+    edited_b.loc[2, 'Ent. 1'] = "07:30"
+    edited_b.loc[2, 'Saí. 2'] = "17:40"
+
+    store.upsert(edited_a, loaded_a)
+    store.upsert(edited_b, loaded_b)
+    assert (day(store, 2)['Ent. 1'], day(store, 2)['Saí. 2']) == ("07:30", "17:40")
+
+
+def test_without_loaded_rows_the_whole_frame_wins(store):
+    # Sem as linhas carregadas (restauração, importação) a gravação substitui o gravado
+    stale = loaded_month(store)
+    edited = stale.copy()
+    edited.loc[2, 'Ent. 1'] = "07:10"
+    store.upsert(edited, stale)
+
+    stale.loc[3, 'Ent. 1'] = "07:20"
+    store.upsert(stale)
+    assert day(store, 2)['Ent. 1'] == "--:--"
+    assert day(store, 3)['Ent. 1'] == "07:20"
+
+
+def test_invalid_punches_are_rejected(store):
+    # Gravadas, virariam "--:--" no cache e nos backups
+    loaded = loaded_month(store)
+    edited = loaded.copy()
+    edited.loc[2, 'Ent. 1'] = "7h30"
+    edited.loc[3, 'Saí. 2'] = "07:15"
+    with pytest.raises(ValueError, match="7h30"):
+        store.upsert(edited, loaded)
+    assert day(store, 3)['Saí. 2'] == "--:--"
+
+
+def test_employees_and_load_periods_read_only_what_is_asked(store):
+    # Outro mês do mesmo funcionário, com salário novo gravado pelo diário
+    july = employee_month('124', pd.Timestamp('2025-07-01'))
+    july['salario_bruto'] = 3500.0
+    store.upsert(july)
+
+    employees = store.employees()
+    assert employees[['matricula', 'nome', 'salario_bruto']].values.tolist() == [['124', 'Funcionário 124', 3500.0]]
+
+    keys = pd.DataFrame({'matricula': ['124'], 'periodo_inicio': [PERIODO_INICIO], 'periodo_fim': [PERIODO_FIM]})
+    june = store.load_periods(keys)
+    assert len(june) == 30
+    assert (june['periodo_inicio'] == PERIODO_INICIO).all()
@@ -0,0 +1,396 @@
+"""Backups deduplicados dos registros de ponto.
+
+Cada snapshot é gravado como uma lista de blocos endereçados pelo conteúdo:
+os registros são divididos por funcionário-período, cada bloco é o CSV
+desse período (comprimido em ``chunks/<sha256>.csv.gz``) e um bloco que já
+existe não é gravado de novo. Como uma gravação normalmente altera um único
+período, cada snapshot novo custa um bloco, e não uma cópia inteira do
+arquivo de registros.
+
+O catálogo ``catalog.sqlite3`` guarda, por snapshot, a data, o número de
+linhas e o checksum, e por bloco a matrícula e o período que ele contém
+(com índice). Listar os backups, saber quais snapshots contêm o funcionário
+X no período Y e restaurar um único funcionário-período são consultas ao
+catálogo seguidas da leitura de, no máximo, os blocos necessários.
+``apply_retention`` mantém o snapshot mais recente de cada hora/dia/mês
+conforme RETENTION (além dos últimos snapshots) e apaga os blocos que
+nenhum snapshot restante usa.
+
+Os funcionários-período gravados depois do último snapshot ficam na tabela
+``pending_periods`` (``mark_changed``). ``create_incremental`` copia a lista
+de blocos do último snapshot e gera blocos só para esses períodos, sem reler
+nem dividir de novo todos os registros; o resultado é o mesmo snapshot (e o
+mesmo checksum) que ``create`` geraria com todos os registros.
+
+Para importar os antigos ``backup_*.csv``::
+
+    python -m utils.backups import-legacy [diretório de dados]
+"""
+import gzip
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+from collections import namedtuple
+from contextlib import closing, contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from utils.schema import PERIOD_KEY
+from utils.storage import (
+    OPTIONAL_COLUMNS, RECORD_COLUMNS, CsvRecordStore, ParquetRecordStore, parse_record_dates, path_lock
+)
+
+CATALOG_NAME = "catalog.sqlite3"
+CHUNKS_DIR = "chunks"
+CHUNK_SUFFIX = ".csv.gz"
+
+# Quantos snapshots manter: os N últimos e o mais recente de cada hora, dia e mês
+RETENTION = {'last': 10, 'hourly': 24, 'daily': 30, 'monthly': 12}
+RETENTION_BUCKETS = {'last': None, 'hourly': '%Y-%m-%d %H', 'daily': '%Y-%m-%d', 'monthly': '%Y-%m'}
+
+LEGACY_STORES = {'.csv': CsvRecordStore, '.parquet': ParquetRecordStore}
+
+# Versão do catálogo (PRAGMA user_version); a 1 criou pending_periods
+CATALOG_VERSION = 1
+
+# Alterações ainda fora dos snapshots: até o id ``last_id`` da fila, ``full`` quando
+# tudo pode ter mudado (restauração) e ``keys`` com os funcionários-período (PERIOD_KEY)
+PendingChanges = namedtuple('PendingChanges', 'last_id full keys')
+
+
+def _atomic_write(path, data):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _sql_date(value):
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def period_chunks(df):
+    """Divide os registros em blocos CSV por funcionário-período.
+
+    Retorna uma lista de ``(chave, sha256, bytes, linhas)``, com a chave
+    ``(matricula, periodo_inicio, periodo_fim)`` em texto. As colunas opcionais
+    vazias no período ficam fora do bloco: o bloco depende só do período, e não
+    dos demais registros de ``df``.
+    """
+    columns = [col for col in RECORD_COLUMNS if col in df.columns]
+    optional = [col for col in OPTIONAL_COLUMNS if col in columns]
+    chunks = []
+    for (matricula, inicio, fim), group in df.groupby(PERIOD_KEY, observed=True, sort=True):
+        empty = [col for col in optional if group[col].isna().all()]
+        data = group[[col for col in columns if col not in empty]].to_csv(index=False).encode('utf-8')
+        key = (str(matricula), _sql_date(inicio), _sql_date(fim))
+        chunks.append((key, hashlib.sha256(data).hexdigest(), data, len(group)))
+    return chunks
+
+
+class BackupStore:
+    """Snapshots dos registros em blocos deduplicados, com catálogo SQLite"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id TEXT PRIMARY KEY,
+            timestamp TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            checksum TEXT NOT NULL,
+            new_chunks INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_snapshots_timestamp ON snapshots (timestamp);
+        CREATE TABLE IF NOT EXISTS snapshot_chunks (
+            snapshot_id TEXT NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            chunk TEXT NOT NULL,
+            matricula TEXT NOT NULL,
+            periodo_inicio TEXT NOT NULL,
+            periodo_fim TEXT NOT NULL,
+            rows INTEGER NOT NULL,
+            PRIMARY KEY (snapshot_id, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_snapshot_chunks_period
+            ON snapshot_chunks (matricula, periodo_inicio, periodo_fim);
+        CREATE INDEX IF NOT EXISTS idx_snapshot_chunks_chunk ON snapshot_chunks (chunk);
+        CREATE TABLE IF NOT EXISTS pending_periods (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            matricula TEXT,
+            periodo_inicio TEXT,
+            periodo_fim TEXT
+        );
+    """
+
+    def __init__(self, directory, retention=None):
+        self.directory = Path(directory)
+        self.chunks_dir = self.directory / CHUNKS_DIR
+        self.catalog_path = self.directory / CATALOG_NAME
+        self.retention = RETENTION if retention is None else retention
+        self._lock = path_lock(self.catalog_path)
+        self._initialized = False
+
+    def chunk_path(self, digest):
+        return self.chunks_dir / f"{digest}{CHUNK_SUFFIX}"
+
+    @contextmanager
+    def connect(self):
+        """Conexão ao catálogo em uma transação (commit ao sair sem erro), fechada no final"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Sem WAL: o catálogo é um único arquivo, sincronizado com o Git
+        with closing(sqlite3.connect(self.catalog_path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA foreign_keys=ON")
+            if not self._initialized:
+                with self._lock:
+                    conn.executescript(self.SCHEMA)
+                    self._upgrade(conn)
+                    self._initialized = True
+            with conn:
+                yield conn
+
+    @staticmethod
+    def _upgrade(conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # Gravações anteriores à fila não foram registradas: o próximo snapshot é completo
+            with conn:
+                if conn.execute("SELECT 1 FROM snapshots LIMIT 1").fetchone():
+                    conn.execute("INSERT INTO pending_periods (matricula) VALUES (NULL)")
+        conn.execute(f"PRAGMA user_version = {CATALOG_VERSION}")
+
+    def _query(self, sql, params=()):
+        with self.connect() as conn:
+            return [dict(row) for row in conn.execute(sql, params)]
+
+    def snapshots(self, limit=None):
+        """Snapshots do mais recente para o mais antigo"""
+        sql = "SELECT * FROM snapshots ORDER BY timestamp DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return self._query(sql)
+
+    def get(self, snapshot_id):
+        rows = self._query("SELECT * FROM snapshots WHERE id = ?", (snapshot_id,))
+        if not rows:
+            raise KeyError(f"Backup não encontrado: {snapshot_id}")
+        return rows[0]
+
+    def snapshots_containing(self, matricula, periodo_inicio=None, periodo_fim=None):
+        """Snapshots (mais recentes primeiro) que contêm o funcionário, opcionalmente no período.
+
+        Cada item traz também o período e o bloco correspondente; blocos
+        repetidos indicam que o período não mudou entre os snapshots.
+        """
+        where, params = "c.matricula = ?", [str(matricula)]
+        if periodo_inicio is not None:
+            where += " AND c.periodo_inicio = ?"
+            params.append(_sql_date(periodo_inicio))
+        if periodo_fim is not None:
+            where += " AND c.periodo_fim = ?"
+            params.append(_sql_date(periodo_fim))
+        return self._query(f"""
+            SELECT s.id, s.timestamp, c.periodo_inicio, c.periodo_fim, c.chunk, c.rows
+            FROM snapshot_chunks c JOIN snapshots s ON s.id = c.snapshot_id
+            WHERE {where}
+            ORDER BY s.timestamp DESC, c.periodo_inicio DESC
+        """, params)
+
+    def mark_changed(self, periods):
+        """Registra os funcionários-período de ``periods`` (PERIOD_KEY) como gravados desde o último snapshot"""
+        keys = periods[PERIOD_KEY].drop_duplicates()
+        with self.connect() as conn:
+            conn.executemany(
+                "INSERT INTO pending_periods (matricula, periodo_inicio, periodo_fim) VALUES (?, ?, ?)",
+                [(str(m), _sql_date(i), _sql_date(f)) for m, i, f in keys.itertuples(index=False)]
+            )
+
+    def mark_all_changed(self):
+        """Todos os registros podem ter mudado (restauração): o próximo snapshot é completo"""
+        with self.connect() as conn:
+            conn.execute("INSERT INTO pending_periods (matricula) VALUES (NULL)")
+
+    def pending_changes(self):
+        """Alterações registradas por mark_changed/mark_all_changed ainda fora dos snapshots"""
+        rows = self._query("SELECT * FROM pending_periods ORDER BY id")
+        keys = pd.DataFrame(
+            [(r['matricula'], r['periodo_inicio'], r['periodo_fim']) for r in rows if r['matricula'] is not None],
+            columns=PERIOD_KEY
+        ).drop_duplicates(ignore_index=True)
+        return PendingChanges(
+            last_id=rows[-1]['id'] if rows else 0,
+            full=any(r['matricula'] is None for r in rows),
+            keys=parse_record_dates(keys),
+        )
+
+    def create(self, df, timestamp=None, pending=None):
+        """Grava um snapshot de ``df`` e aplica a política de retenção.
+
+        ``pending`` (de pending_changes, lido antes de carregar ``df``) sai da
+        fila junto com a gravação do snapshot. Retorna o registro do snapshot
+        no catálogo; ``new_chunks`` indica quantos blocos precisaram ser gravados.
+        """
+        with self._lock:
+            return self._write(period_chunks(df), timestamp, pending)
+
+    def create_incremental(self, pending, records, timestamp=None):
+        """Snapshot a partir do último: só os funcionários-período de ``pending`` são trocados.
+
+        ``records`` são os registros atuais desses períodos (um período sem
+        registros sai do snapshot). Sem snapshot anterior, ou com ``pending.full``,
+        ValueError: use create com todos os registros.
+        """
+        if pending.full:
+            raise ValueError("Alterações pendentes exigem um snapshot completo")
+        changed = {(str(m), _sql_date(i), _sql_date(f)) for m, i, f in pending.keys.itertuples(index=False)}
+        with self._lock:
+            latest = self.snapshots(limit=1)
+            if not latest:
+                raise ValueError("Nenhum snapshot anterior")
+            rows = self._query(
+                "SELECT chunk, matricula, periodo_inicio, periodo_fim, rows FROM snapshot_chunks "
+                "WHERE snapshot_id = ? ORDER BY position", (latest[0]['id'],)
+            )
+            # Blocos reaproveitados já existem: sem bytes para gravar
+            chunks = [((r['matricula'], r['periodo_inicio'], r['periodo_fim']), r['chunk'], None, r['rows'])
+                      for r in rows]
+            chunks = [chunk for chunk in chunks if chunk[0] not in changed]
+            if len(records):
+                chunks += period_chunks(records)
+            # Mesma ordem de period_chunks com todos os registros
+            return self._write(sorted(chunks, key=lambda chunk: chunk[0]), timestamp, pending)
+
+    def _write(self, chunks, timestamp, pending):
+        timestamp = timestamp or datetime.now()
+        checksum = hashlib.sha256("".join(digest for _, digest, _, _ in chunks).encode()).hexdigest()
+
+        self.chunks_dir.mkdir(parents=True, exist_ok=True)
+        new_chunks = 0
+        for _, digest, data, _ in chunks:
+            path = self.chunk_path(digest)
+            if data is not None and not path.exists():
+                _atomic_write(path, gzip.compress(data, mtime=0))
+                new_chunks += 1
+
+        snapshot = {
+            'id': timestamp.strftime('%Y%m%d_%H%M%S_%f'),
+            'timestamp': timestamp.isoformat(),
+            'rows': int(sum(rows for _, _, _, rows in chunks)),
+            'checksum': checksum,
+            'new_chunks': new_chunks,
+        }
+        with self.connect() as conn:
+            self._insert(conn, snapshot, [(key, digest, rows) for key, digest, _, rows in chunks])
+            if pending is not None:
+                conn.execute("DELETE FROM pending_periods WHERE id <= ?", (pending.last_id,))
+        self.apply_retention()
+        return snapshot
+
+    def _insert(self, conn, snapshot, chunks):
+        conn.execute(
+            "INSERT INTO snapshots (id, timestamp, rows, checksum, new_chunks) "
+            "VALUES (:id, :timestamp, :rows, :checksum, :new_chunks)", snapshot
+        )
+        conn.executemany(
+            "INSERT INTO snapshot_chunks (snapshot_id, position, chunk, matricula, periodo_inicio, "
+            "periodo_fim, rows) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(snapshot['id'], position, digest, *key, rows)
+             for position, (key, digest, rows) in enumerate(chunks)]
+        )
+
+    def _read_chunk(self, digest):
+        return CsvRecordStore(self.chunk_path(digest))._read()
+
+    def load(self, snapshot_id):
+        """Reconstrói o DataFrame de registros de um snapshot"""
+        self.get(snapshot_id)
+        rows = self._query(
+            "SELECT chunk FROM snapshot_chunks WHERE snapshot_id = ? ORDER BY position", (snapshot_id,)
+        )
+        frames = [self._read_chunk(row['chunk']) for row in rows]
+        if not frames:
+            return pd.DataFrame(columns=RECORD_COLUMNS)
+        return parse_record_dates(pd.concat(frames, ignore_index=True))
+
+    def load_period(self, snapshot_id, matricula, periodo_inicio, periodo_fim):
+        """Registros de um funcionário-período em um snapshot (lê um único bloco)"""
+        rows = self._query("""
+            SELECT chunk FROM snapshot_chunks
+            WHERE snapshot_id = ? AND matricula = ? AND periodo_inicio = ? AND periodo_fim = ?
+        """, (snapshot_id, str(matricula), _sql_date(periodo_inicio), _sql_date(periodo_fim)))
+        if not rows:
+            raise KeyError(f"Período não encontrado no backup {snapshot_id}")
+        return parse_record_dates(self._read_chunk(rows[0]['chunk']))
+
+    def restore(self, snapshot_id, store):
+        """Substitui os registros de ``store`` pelo conteúdo do snapshot"""
+        df = self.load(snapshot_id)
+        store.save(df)
+        return df
+
+    def restore_period(self, snapshot_id, store, matricula, periodo_inicio, periodo_fim):
+        """Restaura apenas um funcionário-período do snapshot (os demais registros não mudam)"""
+        df = self.load_period(snapshot_id, matricula, periodo_inicio, periodo_fim)
+        store.upsert(df)
+        return df
+
+    def apply_retention(self):
+        """Remove snapshots fora da política de retenção e os blocos órfãos"""
+        with self._lock:
+            snapshots = self.snapshots()
+            if not snapshots or not self.retention:
+                return []
+
+            keep = {snapshots[0]['id']}
+            for policy, count in self.retention.items():
+                buckets = set()
+                for snapshot in snapshots:
+                    if len(buckets) >= count:
+                        break
+                    bucket_format = RETENTION_BUCKETS[policy]
+                    bucket = snapshot['id'] if bucket_format is None else \
+                        datetime.fromisoformat(snapshot['timestamp']).strftime(bucket_format)
+                    if bucket not in buckets:
+                        buckets.add(bucket)
+                        keep.add(snapshot['id'])
+
+            removed = [s['id'] for s in snapshots if s['id'] not in keep]
+            if removed:
+                with self.connect() as conn:
+                    conn.executemany("DELETE FROM snapshots WHERE id = ?", [(i,) for i in removed])
+                self.collect_garbage()
+            return removed
+
+    def collect_garbage(self):
+        """Apaga os blocos que nenhum snapshot do catálogo referencia"""
+        with self._lock:
+            used = {row['chunk'] for row in self._query("SELECT DISTINCT chunk FROM snapshot_chunks")}
+            for path in self.chunks_dir.glob(f"*{CHUNK_SUFFIX}"):
+                if path.name[:-len(CHUNK_SUFFIX)] not in used:
+                    path.unlink(missing_ok=True)
+
+    def import_legacy(self, backup_dir):
+        """Importa os ``backup_*.csv``/``.parquet`` antigos como snapshots (data = mtime)"""
+        imported = []
+        for path in sorted(Path(backup_dir).glob("backup_*")):
+            store_class = LEGACY_STORES.get(path.suffix)
+            if store_class is None or not path.is_file():
+                continue
+            timestamp = datetime.fromtimestamp(path.stat().st_mtime)
+            imported.append(self.create(store_class(path).load(), timestamp))
+        return imported
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != 'import-legacy':
+        sys.exit("Uso: python -m utils.backups import-legacy [diretório de dados]")
+    data_dir = Path(sys.argv[2] if len(sys.argv) > 2 else 'data')
+    for snapshot in BackupStore(data_dir / "backups").import_legacy(data_dir / "backups"):
+        print(f"Importado: {snapshot['id']} ({snapshot['rows']} linhas)")
@@ -0,0 +1,124 @@
+"""Linha de comando para o fechamento do mês, sem o servidor Streamlit.
+
+    python -m utils.cli payroll --mes 2025-06 [--saida folha.csv]
+    python -m utils.cli reports --mes 2025-06 [--saida relatorios.zip] [--consolidado relatorio.pdf] [--processos N]
+    python -m utils.cli import arquivo.txt [--formato afd|csv] [--mapa pis_matricula.csv]
+    python -m utils.cli backup
+
+Todos os comandos aceitam ``--dados`` (diretório de dados, padrão ``data``)
+e ``--backend`` (padrão: PONTO_STORAGE_BACKEND ou csv). Os relatórios são
+renderizados em paralelo (utils.reports) e reaproveitam o cache de PDFs da
+aplicação. Erros terminam o processo com código 1, para uso em cron.
+"""
+import argparse
+import shutil
+import sys
+
+import pandas as pd
+
+from utils.importers import BATCH_LINES, import_punches, read_employee_ids
+from utils.payroll import month_payroll, month_records
+from utils.reports import build_reports_file, build_reports_zip
+from utils.workspace import DATA_DIR, Workspace
+
+PAYROLL_COLUMNS = ["matricula", "nome", "departamento", "periodo_inicio", "periodo_fim",
+                   "worked_days", "bruto", "proporcional", "horas_extras", "total_vencimentos",
+                   "inss", "irrf", "total_descontos", "liquido"]
+
+
+def _month(value):
+    try:
+        return pd.Timestamp(f"{value}-01")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"mês inválido (use AAAA-MM): {value}")
+
+
+def _month_records(workspace, mes):
+    records = month_records(workspace.cache.load(encoded=True), mes)
+    if records.empty:
+        raise SystemExit(f"Nenhum período encontrado em {mes.strftime('%m/%Y')}")
+    return records
+
+
+def cmd_payroll(workspace, args):
+    payroll = month_payroll(_month_records(workspace, args.mes))
+    columns = [col for col in PAYROLL_COLUMNS if col in payroll.columns]
+    payroll[columns].to_csv(args.saida or sys.stdout, index=False)
+    print(f"{len(payroll)} funcionários-período; líquido total {payroll['liquido'].sum():.2f}", file=sys.stderr)
+
+
+def cmd_reports(workspace, args):
+    records = _month_records(workspace, args.mes)
+    payroll = month_payroll(records)
+    saida = args.saida or f"relatorios_{args.mes.strftime('%Y_%m')}.zip"
+    with open(saida, 'wb') as f:
+        f.write(build_reports_zip(records, payroll, max_workers=args.processos,
+                                  cache=workspace.report_cache))
+    print(f"Relatórios: {saida}", file=sys.stderr)
+    if args.consolidado:
+        with build_reports_file(records, payroll) as pdf, open(args.consolidado, 'wb') as f:
+            shutil.copyfileobj(pdf, f)
+        print(f"Relatório consolidado: {args.consolidado}", file=sys.stderr)
+
+
+def cmd_import(workspace, args):
+    summary = import_punches(
+        args.arquivo, workspace.records,
+        employee_ids=read_employee_ids(args.mapa) if args.mapa else None,
+        kind=args.formato, batch_lines=args.lote,
+        on_batch=lambda s: print(f"{s['linhas']} linhas lidas, {s['dias']} dias gravados", file=sys.stderr)
+    )
+    workspace.records_changed(summary['periodos'])
+    print(f"Linhas: {summary['linhas']}  Marcações: {summary['marcacoes']}  "
+          f"Rejeitadas: {summary['rejeitadas']}  Não cadastradas: {summary['nao_cadastradas']}  "
+          f"Descartadas: {summary['descartadas']}  Dias gravados: {summary['dias']}  "
+          f"Fora da escala: {summary['fora_da_escala']}")
+
+
+def cmd_backup(workspace, args):
+    snapshot = workspace.create_backup()
+    if snapshot is None:
+        raise SystemExit("Nenhum registro para backup")
+    print(f"Backup criado: {snapshot['id']} ({snapshot['rows']} linhas)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m utils.cli", description="Controle de Ponto Eletrônico")
+    parser.add_argument('--dados', default=str(DATA_DIR), help="diretório de dados (padrão: data)")
+    parser.add_argument('--backend', help="backend de armazenamento (padrão: PONTO_STORAGE_BACKEND ou csv)")
+    commands = parser.add_subparsers(dest='comando', required=True)
+
+    payroll = commands.add_parser('payroll', help="folha do mês em CSV")
+    payroll.add_argument('--mes', type=_month, required=True, help="mês de referência (AAAA-MM)")
+    payroll.add_argument('--saida', help="arquivo CSV (padrão: saída padrão)")
+    payroll.set_defaults(run=cmd_payroll)
+
+    reports = commands.add_parser('reports', help="relatórios individuais em PDF (ZIP)")
+    reports.add_argument('--mes', type=_month, required=True, help="mês de referência (AAAA-MM)")
+    reports.add_argument('--saida', help="arquivo ZIP (padrão: relatorios_AAAA_MM.zip)")
+    reports.add_argument('--consolidado', help="também gera um PDF único com todos os relatórios")
+    reports.add_argument('--processos', type=int, help="processos de renderização (padrão: CPUs)")
+    reports.set_defaults(run=cmd_reports)
+
+    importer = commands.add_parser('import', help="importa marcações de AFD ou CSV")
+    importer.add_argument('arquivo')
+    importer.add_argument('--formato', choices=['afd', 'csv'])
+    importer.add_argument('--mapa', help="CSV identificador,matricula (PIS/CPF do relógio -> matrícula)")
+    importer.add_argument('--lote', type=int, default=BATCH_LINES, help="linhas por lote")
+    importer.set_defaults(run=cmd_import)
+
+    backup = commands.add_parser('backup', help="cria um snapshot de backup dos registros")
+    backup.set_defaults(run=cmd_backup)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        args.run(Workspace(args.dados, args.backend), args)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Erro: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""Importação em lote das marcações exportadas pelos relógios de ponto.
+
+Formatos aceitos:
+
+- AFD (Arquivo Fonte de Dados do REP), de largura fixa: são lidos os
+  registros tipo 3 (marcação), tanto no leiaute da Portaria 1510
+  (data DDMMAAAA, hora HHMM e PIS) quanto no da Portaria 671 (data e hora
+  ISO 8601 e CPF);
+- CSV com cabeçalho e as colunas ``matricula`` (ou ``identificador``),
+  ``data`` ("AAAA-MM-DD" ou "DD/MM/AAAA") e ``hora`` ("HH:MM"), ou uma
+  coluna ``data_hora``.
+
+O arquivo é lido linha a linha por geradores e processado em lotes de
+``batch_lines`` linhas: cada lote tem as datas e horas validadas de uma vez
+(pandas), as marcações agrupadas por funcionário-dia nos campos Ent. 1,
+Saí. 1, Ent. 2 e Saí. 2 (em ordem de horário; a partir da quinta, são
+descartadas) e os dias gravados com ``upsert``. A memória usada depende do
+tamanho do lote, não do arquivo nem dos registros já gravados: o cadastro é
+lido só com as suas colunas (``RecordStore.employees``) e cada lote é
+comparado só com os seus funcionários-período (``RecordStore.load_periods``).
+
+O arquivo deve estar em ordem cronológica (o AFD está, pelo NSR): as
+marcações do último dia de cada lote ficam para o lote seguinte, para que um
+dia nunca seja gravado pela metade. Cada dia importado substitui o registro
+do mesmo dia (inclusive marcações digitadas na tela). Dias sem expediente
+(fim de semana ou feriado) com marcações são gravados como horas extras,
+contados no resumo (``fora_da_escala``) e aparecem na tela de ponto como os
+demais. Funcionários são identificados pela matrícula ou, no AFD, pelo
+PIS/CPF através de ``employee_ids``; identificadores sem funcionário
+cadastrado são contados e ignorados.
+
+Para importar pela linha de comando::
+
+    python -m utils.cli import arquivo.txt [--mapa pis_matricula.csv] [--dados data]
+"""
+import csv
+import io
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.punch_engine import MISSING, OFF_SHIFT, PUNCH_COLUMNS, calculate_period_hours, day_labels
+from utils.schema import PERIOD_KEY
+from utils.shifts import get_shift_registry
+from utils.storage import decode_records
+
+BATCH_LINES = 50_000
+AFD_ENCODING = 'latin-1'
+TIMESTAMP_FORMATS = ['%Y-%m-%d %H:%M', '%d/%m/%Y %H:%M']
+EMPLOYEE_FIELDS = ['nome', 'departamento', 'cargo', 'salario_bruto']
+
+
+def afd_punches(lines):
+    """Gera ``(identificador, "AAAA-MM-DD HH:MM")`` para cada registro tipo 3 do AFD"""
+    for line in lines:
+        if len(line) < 34 or line[9] != '3':
+            continue
+        if line[14] == '-':
+            # Portaria 671: NSR, tipo, "AAAA-MM-DDThh:mm:00-0300", CPF
+            yield line[34:46].strip(), f"{line[10:20]} {line[21:26]}"
+        else:
+            # Portaria 1510: NSR, tipo, DDMMAAAA, HHMM, PIS
+            yield line[22:34].strip(), \
+                f"{line[14:18]}-{line[12:14]}-{line[10:12]} {line[18:20]}:{line[20:22]}"
+
+
+def csv_punches(lines):
+    """Gera ``(identificador, "data hora")`` para cada linha de um CSV de marcações"""
+    reader = csv.DictReader(lines, delimiter=';' if _is_semicolon(lines) else ',')
+    columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+    id_column = columns.get('matricula') or columns.get('identificador')
+    if id_column is None:
+        raise ValueError("CSV de marcações sem coluna 'matricula' ou 'identificador'")
+    if 'data_hora' in columns:
+        stamp_column = columns['data_hora']
+        for row in reader:
+            yield (row[id_column] or '').strip(), (row[stamp_column] or '').strip().replace('T', ' ')[:16]
+    elif 'data' in columns and 'hora' in columns:
+        date_column, time_column = columns['data'], columns['hora']
+        for row in reader:
+            yield (row[id_column] or '').strip(), \
+                f"{(row[date_column] or '').strip()} {(row[time_column] or '').strip()}"
+    else:
+        raise ValueError("CSV de marcações sem colunas 'data' e 'hora' (ou 'data_hora')")
+
+
+def _is_semicolon(lines):
+    # Exportações brasileiras costumam usar ';'; decide pelo cabeçalho sem consumi-lo
+    peek = getattr(lines, 'peek_header', None)
+    return peek is not None and peek.count(';') > peek.count(',')
+
+
+class _Lines:
+    """Iterador de linhas de texto que guarda o cabeçalho para inspeção"""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.peek_header = stream.readline()
+        self._first = self.peek_header
+
+    def __iter__(self):
+        if self._first:
+            yield self._first.rstrip('\r\n')
+            self._first = None
+        for line in self.stream:
+            yield line.rstrip('\r\n')
+
+
+def read_punches(source, kind=None):
+    """Gera as marcações de ``source`` (caminho ou arquivo aberto, texto ou binário).
+
+    ``kind`` é 'afd' ou 'csv'; sem ele, decide pela extensão (.csv) ou pelo
+    conteúdo (AFD).
+    """
+    name = str(getattr(source, 'name', source))
+    if kind is None:
+        kind = 'csv' if name.lower().endswith('.csv') else 'afd'
+    opened = None
+    if isinstance(source, (str, Path)):
+        source = opened = open(source, 'rb')
+    try:
+        stream = source
+        if not isinstance(source, io.TextIOBase):
+            encoding = AFD_ENCODING if kind == 'afd' else 'utf-8-sig'
+            stream = io.TextIOWrapper(source, encoding=encoding, errors='replace', newline='')
+        lines = _Lines(stream)
+        yield from (afd_punches(lines) if kind == 'afd' else csv_punches(lines))
+    finally:
+        if opened is not None:
+            opened.close()
+
+
+def parse_timestamps(stamps):
+    """Valida em bloco os textos "data hora"; inválidos viram NaT"""
+    stamps = pd.Series(stamps, dtype=object)
+    parsed = pd.to_datetime(stamps, format=TIMESTAMP_FORMATS[0], errors='coerce')
+    for fmt in TIMESTAMP_FORMATS[1:]:
+        missing = parsed.isna()
+        if not missing.any():
+            break
+        parsed[missing] = pd.to_datetime(stamps[missing], format=fmt, errors='coerce')
+    return parsed
+
+
+def employee_directory(records):
+    """Último cadastro (nome, departamento, cargo, salário) de cada matrícula"""
+    if records.empty:
+        return pd.DataFrame(columns=EMPLOYEE_FIELDS)
+    fields = [col for col in EMPLOYEE_FIELDS if col in records.columns]
+    directory = records.assign(matricula=records['matricula'].astype(str)) \
+        .drop_duplicates('matricula', keep='last') \
+        .set_index('matricula')[fields]
+    return directory.astype(object)
+
+
+def punch_slots(punches):
+    """Agrupa marcações ``(matricula, momento)`` em uma linha por funcionário-dia.
+
+    Retorna ``(dias, descartadas)``: ``dias`` tem ``matricula``, ``data`` e
+    as colunas PUNCH_COLUMNS em minutos (MISSING quando não houve a
+    marcação); ``descartadas`` conta as marcações além da quarta do dia.
+    """
+    punches = punches.assign(
+        data=punches['momento'].dt.normalize(),
+        minuto=(punches['momento'].dt.hour * 60 + punches['momento'].dt.minute).astype(np.int16),
+    ).drop_duplicates(['matricula', 'data', 'minuto']) \
+        .sort_values(['matricula', 'data', 'minuto'], kind='stable')
+
+    slot = punches.groupby(['matricula', 'data'], sort=False).cumcount()
+    kept = slot < len(PUNCH_COLUMNS)
+    discarded = int((~kept).sum())
+    days = punches[kept].assign(slot=slot[kept]) \
+        .pivot(index=['matricula', 'data'], columns='slot', values='minuto') \
+        .reindex(columns=range(len(PUNCH_COLUMNS))) \
+        .fillna(MISSING).astype(np.int16)
+    days.columns = PUNCH_COLUMNS
+    return days.reset_index(), discarded
+
+
+def day_records(days, directory, registry=None):
+    """Monta os registros diários (formato da aplicação) a partir de punch_slots"""
+    registry = registry or get_shift_registry()
+    days = days.join(directory, on='matricula')
+    days['periodo_inicio'] = days['data'].dt.to_period('M').dt.start_time
+    days['periodo_fim'] = days['data'].dt.to_period('M').dt.end_time.dt.normalize()
+    days['Dia'] = day_labels(days['data'])
+
+    turno = np.empty(len(days), dtype=object)
+    expected = np.empty((len(days), len(PUNCH_COLUMNS)), dtype=np.int32)
+    for (matricula, inicio, fim), group in days.groupby(PERIOD_KEY, sort=False):
+        schedule = registry.compile(inicio, fim, matricula, group['departamento'].iloc[0])
+        positions = schedule.positions(group['Dia'])
+        rows = days.index.get_indexer(group.index)
+        turno[rows] = schedule.turno[positions]
+        expected[rows] = schedule.expected[positions]
+    days['Turno'] = turno
+
+    days[['Horas', 'Observações']] = calculate_period_hours(days, expected=expected)
+    return decode_records(days.drop(columns='data'))
+
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def import_punches(source, store, employee_ids=None, kind=None, batch_lines=BATCH_LINES,
+                   on_batch=None):
+    """Importa as marcações de ``source`` para ``store`` em lotes.
+
+    ``employee_ids`` mapeia identificadores do arquivo (PIS/CPF) para
+    matrículas; sem ele, o identificador é a própria matrícula (sem zeros à
+    esquerda). ``on_batch(resumo)`` é chamado após cada lote gravado.
+    Retorna o resumo: linhas lidas, marcações válidas, rejeitadas (data ou
+    hora inválida), não cadastradas, descartadas, dias gravados, dias fora
+    da escala (fim de semana ou feriado, gravados como horas extras) e os
+    funcionários-período alterados (``periodos``, DataFrame com PERIOD_KEY).
+    """
+    # Só as colunas do cadastro; cada lote compara só com os funcionários-período dele (upsert)
+    directory = employee_directory(store.employees() if store.exists() else pd.DataFrame())
+    employee_ids = {str(key): str(value) for key, value in (employee_ids or {}).items()}
+    summary = {'linhas': 0, 'marcacoes': 0, 'rejeitadas': 0, 'nao_cadastradas': 0,
+               'descartadas': 0, 'dias': 0, 'fora_da_escala': 0}
+    periods = []
+    pending = None
+
+    def flush(punches):
+        days, discarded = punch_slots(punches)
+        summary['descartadas'] += discarded
+        if days.empty:
+            return
+        records = day_records(days, directory)
+        store.upsert(records)
+        summary['dias'] += len(records)
+        summary['fora_da_escala'] += int((records['Turno'] == OFF_SHIFT).sum())
+        periods.append(records[PERIOD_KEY].drop_duplicates())
+        if on_batch is not None:
+            on_batch(dict(summary))
+
+    for batch in _batches(read_punches(source, kind), batch_lines):
+        summary['linhas'] += len(batch)
+        identifiers, stamps = zip(*batch)
+        punches = pd.DataFrame({'identificador': identifiers, 'momento': parse_timestamps(stamps)})
+
+        valid = punches['momento'].notna()
+        summary['rejeitadas'] += int((~valid).sum())
+        punches = punches[valid]
+
+        identifier = punches['identificador'].astype(str)
+        if employee_ids:
+            matricula = identifier.map(employee_ids)
+        else:
+            matricula = identifier.str.lstrip('0').replace('', '0')
+        registered = matricula.isin(directory.index)
+        summary['nao_cadastradas'] += int((~registered).sum())
+        punches = pd.DataFrame({'matricula': matricula[registered], 'momento': punches['momento'][registered]})
+        summary['marcacoes'] += len(punches)
+
+        if pending is not None:
+            punches = pd.concat([pending, punches], ignore_index=True)
+        if punches.empty:
+            pending = None
+            continue
+        # O último dia do lote pode continuar no próximo
+        last_day = punches['momento'].max().normalize()
+        open_day = punches['momento'] >= last_day
+        pending = punches[open_day]
+        flush(punches[~open_day])
+
+    if pending is not None and not pending.empty:
+        flush(pending)
+
+    if store.needs_compaction():
+        store.compact()
+    summary['periodos'] = pd.concat(periods, ignore_index=True).drop_duplicates() \
+        if periods else pd.DataFrame(columns=PERIOD_KEY)
+    return summary
+
+
+def read_employee_ids(path):
+    """Lê um CSV ``identificador,matricula`` (PIS/CPF do relógio -> matrícula)"""
+    mapping = pd.read_csv(path, dtype=str, sep=None, engine='python')
+    mapping.columns = [col.strip().lower() for col in mapping.columns]
+    return dict(zip(mapping['identificador'].str.strip(), mapping['matricula'].str.strip()))
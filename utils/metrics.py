@@ -0,0 +1,193 @@
+"""Medição de tempo dos trechos quentes da aplicação.
+
+``timed`` (decorador) e ``timer`` (gerenciador de contexto) registram a
+duração de cada etapa no registro do processo: contagem, soma, máximo, um
+histograma de faixas fixas (como o de um histograma do Prometheus) e as
+últimas RECENT_SAMPLES durações, usadas nos percentis. O custo por medição é
+de alguns microssegundos, então a instrumentação fica sempre ligada.
+
+As medições de uma execução do script (um rerun do Streamlit roda inteiro
+em uma thread) são agrupadas entre ``start_run`` e ``finish_run``. Medições
+feitas nos processos de trabalho de utils.reports ficam nesses processos e
+não aparecem aqui: o tempo total da geração é medido por quem a chamou.
+
+Exportação opcional, configurada por ``PONTO_METRICS_EXPORT``:
+
+- caminho terminado em ``.prom``: texto no formato do Prometheus, regravado
+  a cada execução (para o textfile collector do node_exporter);
+- qualquer outro caminho: JSON lines, uma linha por execução com a duração
+  de cada etapa.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+
+# Limites superiores das faixas do histograma, em segundos
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+RECENT_SAMPLES = 1000
+PROMETHEUS_METRIC = "ponto_stage_duration_seconds"
+
+
+class StageStats:
+    """Durações acumuladas de uma etapa"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # Uma faixa a mais para as durações acima do último limite (+Inf)
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.recent = deque(maxlen=RECENT_SAMPLES)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+        self.recent.append(seconds)
+
+    def quantile(self, q):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class MetricsRegistry:
+    """Durações por etapa de todas as threads do processo"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._local = threading.local()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.add(seconds)
+        run = getattr(self._local, 'run', None)
+        if run is not None:
+            run.append((stage, seconds))
+
+    def start_run(self):
+        """Começa a agrupar as medições desta thread (uma execução do script)"""
+        self._local.run = []
+
+    def finish_run(self):
+        """Encerra o agrupamento; retorna ``[(etapa, segundos)]`` na ordem em que terminaram"""
+        run = getattr(self._local, 'run', None) or []
+        self._local.run = None
+        return run
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+    def summary(self):
+        """Uma linha por etapa: chamadas, média, p50, p95 e máximo (em ms)"""
+        with self._lock:
+            return [{
+                'etapa': stage,
+                'chamadas': stats.count,
+                'media_ms': stats.total / stats.count * 1000,
+                'p50_ms': stats.quantile(0.5) * 1000,
+                'p95_ms': stats.quantile(0.95) * 1000,
+                'max_ms': stats.max * 1000,
+                'total_s': stats.total,
+            } for stage, stats in sorted(self._stages.items())]
+
+    def histogram(self, stage):
+        """``[(faixa, contagem)]`` da etapa, sem acumular (para gráficos)"""
+        with self._lock:
+            stats = self._stages.get(stage)
+            counts = list(stats.buckets) if stats else [0] * (len(BUCKETS) + 1)
+        labels = [f"≤ {limit * 1000:g} ms" for limit in BUCKETS] + [f"> {BUCKETS[-1] * 1000:g} ms"]
+        return list(zip(labels, counts))
+
+    def prometheus_text(self):
+        """Histogramas de todas as etapas no formato de texto do Prometheus"""
+        lines = [f"# HELP {PROMETHEUS_METRIC} Duração das etapas da aplicação de ponto.",
+                 f"# TYPE {PROMETHEUS_METRIC} histogram"]
+        with self._lock:
+            for stage, stats in sorted(self._stages.items()):
+                label = stage.replace('\\', '\\\\').replace('"', '\\"')
+                cumulative = 0
+                for limit, count in zip((*BUCKETS, '+Inf'), stats.buckets):
+                    cumulative += count
+                    lines.append(f'{PROMETHEUS_METRIC}_bucket{{stage="{label}",le="{limit}"}} {cumulative}')
+                lines.append(f'{PROMETHEUS_METRIC}_sum{{stage="{label}"}} {stats.total:.6f}')
+                lines.append(f'{PROMETHEUS_METRIC}_count{{stage="{label}"}} {stats.count}')
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+_export_lock = threading.Lock()
+
+
+@contextmanager
+def timer(stage, registry=REGISTRY):
+    """Mede o bloco ``with`` como ``stage`` (também quando ele termina com exceção)"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        registry.record(stage, time.perf_counter() - start)
+
+
+def timed(stage=None, registry=REGISTRY):
+    """Decorador: mede cada chamada da função (etapa padrão: o nome qualificado dela)"""
+    def decorator(func):
+        name = stage or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                registry.record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def start_run():
+    REGISTRY.start_run()
+
+
+def finish_run(path=None):
+    """Encerra a execução da thread atual e exporta, se configurado; retorna as medições"""
+    run = REGISTRY.finish_run()
+    path = path or os.getenv('PONTO_METRICS_EXPORT')
+    if path and run:
+        export(run, path)
+    return run
+
+
+def export(run, path, registry=REGISTRY):
+    """Grava as métricas em ``path``: texto do Prometheus (.prom) ou uma linha JSON por execução"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix == '.prom':
+        # Troca atômica: o coletor nunca lê um arquivo pela metade
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(registry.prometheus_text())
+        os.replace(tmp_path, path)
+        return
+    stages = {}
+    for stage, seconds in run:
+        stages[stage] = round(stages.get(stage, 0.0) + seconds * 1000, 3)
+    line = json.dumps({'timestamp': datetime.now().isoformat(timespec='seconds'), 'stages_ms': stages},
+                      ensure_ascii=False)
+    with _export_lock, open(path, 'a', encoding='utf-8') as f:
+        f.write(line + "\n")
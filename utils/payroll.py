@@ -0,0 +1,179 @@
+"""Cálculo de folha de pagamento.
+
+``calculate_salary`` / ``calculate_taxes`` calculam um funcionário (tela
+de ponto); ``calculate_payroll`` aplica as mesmas regras a um DataFrame com
+vários funcionários de uma vez. Ambos consultam as faixas de INSS e IRRF
+pré-compiladas de utils.tax_tables.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.punch_engine import worked_days_mask
+from utils.tax_tables import get_tax_table
+
+PAYROLL_DEFAULTS = {
+    'horas_extras': 0.0,
+    'adicional_noturno': 0.0,
+    'outros_beneficios': 0.0,
+    'outros_descontos': 0.0,
+    'dependentes': 0,
+}
+
+
+def calculate_daily_salary(salario_bruto, dias_base=22):
+    return salario_bruto / dias_base
+
+
+def calculate_hourly_salary(salario_bruto, horas_base=220):
+    return salario_bruto / horas_base
+
+
+def calculate_taxes(salario_bruto, dependentes=0, ano=None):
+    tabela = get_tax_table(ano)
+    inss = tabela.inss(salario_bruto)
+
+    base_irrf = salario_bruto - inss - (dependentes * tabela.deducao_dependente)
+    irrf = tabela.irrf(base_irrf)
+
+    return {
+        'inss': inss,
+        'irrf': max(0, irrf)
+    }
+
+
+def calculate_salary(salario_bruto, dias_trabalhados, horas_extras=0, adicional_noturno=0,
+                     outros_beneficios=0, outros_descontos=0, dependentes=0, dias_base=22, horas_base=220,
+                     ano=None):
+    valor_dia = salario_bruto / dias_base
+    valor_hora = salario_bruto / horas_base
+
+    proporcional = valor_dia * dias_trabalhados
+    valor_horas_extras = horas_extras * valor_hora * 1.5
+
+    total_vencimentos = proporcional + adicional_noturno + valor_horas_extras + outros_beneficios
+
+    taxes = calculate_taxes(proporcional, dependentes, ano)
+    total_descontos = taxes['inss'] + taxes['irrf'] + outros_descontos
+
+    liquido = total_vencimentos - total_descontos
+
+    return {
+        'bruto': salario_bruto,
+        'proporcional': proporcional,
+        'adicional_noturno': adicional_noturno,
+        'horas_extras': valor_horas_extras,
+        'outros_beneficios': outros_beneficios,
+        'total_vencimentos': total_vencimentos,
+        'inss': taxes['inss'],
+        'irrf': taxes['irrf'],
+        'outros_descontos': outros_descontos,
+        'total_descontos': total_descontos,
+        'liquido': max(0, liquido),
+        'worked_days': dias_trabalhados
+    }
+
+
+def calculate_taxes_batch(salario_bruto, dependentes=0, ano=None):
+    """Versão vetorizada de calculate_taxes; retorna (inss, irrf) como arrays.
+
+    ``ano`` pode ser um único ano ou um array (um por funcionário); cada ano
+    usa a sua tabela de utils.tax_tables.
+    """
+    s = np.asarray(salario_bruto, dtype=float)
+    dependentes = np.broadcast_to(np.asarray(dependentes, dtype=float), s.shape)
+    anos = np.broadcast_to(np.asarray(ano, dtype=object), s.shape)
+
+    inss = np.empty_like(s)
+    irrf = np.empty_like(s)
+    for year in pd.unique(anos.ravel()):
+        tabela = get_tax_table(None if pd.isna(year) else int(year))
+        mask = anos == year if not pd.isna(year) else pd.isna(anos)
+        inss[mask] = tabela.inss_batch(s[mask])
+        base_irrf = s[mask] - inss[mask] - dependentes[mask] * tabela.deducao_dependente
+        irrf[mask] = tabela.irrf_batch(base_irrf)
+    return inss, irrf
+
+
+def calculate_payroll(employees, dias_base=22, horas_base=220):
+    """Calcula a folha de todos os funcionários de ``employees``.
+
+    ``employees`` precisa das colunas ``salario_bruto`` e
+    ``dias_trabalhados``; ``horas_extras``, ``adicional_noturno``,
+    ``outros_beneficios``, ``outros_descontos`` e ``dependentes`` são
+    opcionais (zero quando ausentes) e ``ano`` escolhe a tabela de impostos
+    (a mais recente quando ausente). Retorna um DataFrame com o mesmo
+    índice e as mesmas chaves do dicionário de calculate_salary.
+    """
+    values = {
+        col: employees[col].fillna(default).to_numpy(dtype=float) if col in employees.columns
+        else np.full(len(employees), default, dtype=float)
+        for col, default in PAYROLL_DEFAULTS.items()
+    }
+    salario_bruto = employees['salario_bruto'].to_numpy(dtype=float)
+    dias_trabalhados = employees['dias_trabalhados'].to_numpy()
+
+    valor_dia = salario_bruto / dias_base
+    valor_hora = salario_bruto / horas_base
+
+    proporcional = valor_dia * dias_trabalhados
+    valor_horas_extras = values['horas_extras'] * valor_hora * 1.5
+
+    total_vencimentos = proporcional + values['adicional_noturno'] + valor_horas_extras \
+        + values['outros_beneficios']
+
+    ano = employees['ano'].to_numpy() if 'ano' in employees.columns else None
+    inss, irrf = calculate_taxes_batch(proporcional, values['dependentes'], ano)
+    total_descontos = inss + irrf + values['outros_descontos']
+
+    liquido = total_vencimentos - total_descontos
+
+    return pd.DataFrame({
+        'bruto': salario_bruto,
+        'proporcional': proporcional,
+        'adicional_noturno': values['adicional_noturno'],
+        'horas_extras': valor_horas_extras,
+        'outros_beneficios': values['outros_beneficios'],
+        'total_vencimentos': total_vencimentos,
+        'inss': inss,
+        'irrf': irrf,
+        'outros_descontos': values['outros_descontos'],
+        'total_descontos': total_descontos,
+        'liquido': np.maximum(0, liquido),
+        'worked_days': dias_trabalhados,
+    }, index=employees.index)
+
+
+def payroll_inputs(records):
+    """Resume os registros diários em uma linha por funcionário-período.
+
+    Dias trabalhados são os dias com ``Horas`` diferente de "00:00" (como em
+    render_summary); quando um dia aparece repetido vale o primeiro registro.
+    Aceita os registros com horários em texto ou em minutos.
+    """
+    keys = ['matricula', 'periodo_inicio', 'periodo_fim']
+    days = records.drop_duplicates(keys + ['Dia'], keep='first')
+    worked = pd.Series(worked_days_mask(days['Horas']), index=days.index).groupby([days[k] for k in keys], observed=True).sum()
+
+    columns = [col for col in ['nome', 'departamento', 'cargo', 'salario_bruto', 'horas_extras']
+               if col in records.columns]
+    summary = records.groupby(keys, observed=True)[columns].last()
+    summary['dias_trabalhados'] = worked.reindex(summary.index).fillna(0).astype(int)
+    summary = summary.reset_index()
+    summary['ano'] = summary['periodo_inicio'].dt.year
+    return summary
+
+
+def month_records(records, referencia):
+    """Registros dos períodos que começam no mês de ``referencia``"""
+    if records.empty:
+        return records
+    inicio_mes = pd.Timestamp(referencia).replace(day=1).normalize()
+    no_mes = (records['periodo_inicio'] >= inicio_mes) & \
+             (records['periodo_inicio'] < inicio_mes + pd.DateOffset(months=1))
+    return records[no_mes]
+
+
+def month_payroll(records):
+    """Folha de um mês: uma linha por funcionário-período, com os dados de entrada e o cálculo"""
+    employees = payroll_inputs(records)
+    return pd.concat([employees, calculate_payroll(employees)], axis=1)
@@ -1,163 +1,200 @@
+"""Gerador do Relatório de Frequência Individual.
+
+Tudo o que não depende do funcionário é montado uma única vez por processo:
+a folha de estilos, o ``TableStyle`` da tabela de ponto, o logo (decodificado
+em um ``ImageReader``) e os flowables do cabeçalho da empresa e do título.
+Cada relatório recebe cópias rasas desse cabeçalho, de modo que o custo por
+PDF fica só no conteúdo do funcionário.
+
+Relatórios longos (um ano inteiro, todos os funcionários) usam
+``generate_file``: o documento é gravado em um arquivo temporário em vez de
+um BytesIO, e a tabela de ponto é quebrada em tabelas de no máximo
+TABLE_CHUNK_ROWS linhas, com o cabeçalho repetido em cada página.
+"""
+import copy
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+from PIL import Image as PILImage
+from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Image, Spacer
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
 from reportlab.lib.units import inch
-import locale
-from datetime import datetime
-import os
+from reportlab.lib.utils import ImageReader
+from reportlab.platypus import Flowable, PageBreak, SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+LOGO_FILE = Path(__file__).resolve().parent.parent / "assets" / "logo.png"
+LOGO_SIZE = (1.5*inch, 0.5*inch)
+LOGO_DPI = 200
+
+COMPANY_INFO = {
+    'name': 'Imobiliaria Celeste LTDA EPP',
+    'address': 'Rua das Aroeiras, 617',
+    'city': 'Sinop',
+    'state': 'MT',
+    'cep': '78550-224',
+    'cnpj': '04.052.691/0001-28'
+}
+REPORT_TITLE = "Relatório de Frequência Individual"
+
+# Até um mês de marcações por tabela; o ReportLab divide cada uma entre
+# páginas sem precisar medir a tabela do relatório inteiro a cada quebra
+TABLE_CHUNK_ROWS = 31
+
+TIME_TABLE_HEADER = ["Dia", "Entrada 1", "Saída 1", "Entrada 2", "Saída 2", "Horas", "Observações"]
+TIME_TABLE_WIDTHS = [0.8*inch] * 6 + [2*inch]
+TIME_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+])
+
+
+@lru_cache(maxsize=None)
+def get_styles():
+    """Folha de estilos compartilhada (não modificar)"""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='Header1',
+        parent=styles['Heading1'],
+        fontSize=14,
+        leading=16,
+        alignment=1,
+        spaceAfter=12
+    ))
+    styles.add(ParagraphStyle(
+        name='Header2',
+        parent=styles['Heading2'],
+        fontSize=12,
+        leading=14,
+        spaceAfter=8
+    ))
+    styles.add(ParagraphStyle(
+        name='NormalCenter',
+        parent=styles['Normal'],
+        alignment=1
+    ))
+    return styles
+
+
+@lru_cache(maxsize=None)
+def get_logo():
+    """Logo decodificado uma única vez; None quando assets/logo.png não existe.
+
+    A imagem é reduzida para LOGO_DPI no tamanho em que é desenhada, para
+    não recomprimir o PNG original em cada relatório.
+    """
+    if not LOGO_FILE.exists():
+        return None
+    with PILImage.open(LOGO_FILE) as image:
+        pixels = tuple(round(size / inch * LOGO_DPI) for size in LOGO_SIZE)
+        return ImageReader(image.convert('RGBA').resize(pixels, PILImage.LANCZOS))
+
+
+class Logo(Flowable):
+    """Desenha o ImageReader compartilhado, centralizado"""
+
+    def __init__(self, image):
+        super().__init__()
+        self.image = image
+        self.width, self.height = LOGO_SIZE
+        self.hAlign = 'CENTER'
+
+    def wrap(self, availWidth, availHeight):
+        return self.width, self.height
+
+    def draw(self):
+        self.canv.drawImage(self.image, 0, 0, self.width, self.height, mask='auto')
+
+
+@lru_cache(maxsize=8)
+def _header_template(company_items, title):
+    styles = get_styles()
+    company_info = dict(company_items)
+    flowables = []
+    logo = get_logo()
+    if logo is not None:
+        flowables.append(Logo(logo))
+    flowables.extend([
+        Paragraph(company_info['name'], styles['Header1']),
+        Paragraph(company_info['address'], styles['NormalCenter']),
+        Paragraph(f"{company_info['city']}/{company_info['state']} - CEP: {company_info['cep']}",
+                  styles['NormalCenter']),
+        Paragraph(f"CNPJ: {company_info['cnpj']}", styles['NormalCenter']),
+        Spacer(1, 0.5*inch),
+    ])
+    if title:
+        flowables.append(Paragraph(title, styles['Header1']))
+    return tuple(flowables)
+
+
+def header_flowables(company_info=COMPANY_INFO, title=None):
+    """Cópias do cabeçalho pré-montado (empresa e, opcionalmente, título)"""
+    template = _header_template(tuple(sorted(company_info.items())), title)
+    return [copy.copy(flowable) for flowable in template]
 
-# Configuração de localização
-locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
 
 class PDFGenerator:
     def __init__(self, filename):
         self.filename = filename
-        self.doc = SimpleDocTemplate(
-            filename,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        self.styles = getSampleStyleSheet()
-        self.elements = []
-        
-        # Estilos customizados
-        self.styles.add(ParagraphStyle(
-            name='CompanyName',
-            fontSize=14,
-            leading=16,
-            alignment=1,
-            spaceAfter=12
-        ))
-        self.styles.add(ParagraphStyle(
-            name='ReportTitle',
-            fontSize=12,
-            leading=14,
-            alignment=1,
-            spaceAfter=12
-        ))
-        self.styles.add(ParagraphStyle(
-            name='EmployeeInfo',
-            fontSize=10,
-            leading=12,
-            spaceAfter=6
-        ))
-        self.styles.add(ParagraphStyle(
-            name='TableHeader',
-            fontSize=9,
-            leading=10,
-            alignment=1,
-            textColor=colors.white,
-            backColor=colors.HexColor('#1e3a8a')
-        ))
-        self.styles.add(ParagraphStyle(
-            name='TableCell',
-            fontSize=8,
-            leading=9,
-            alignment=1
-        ))
-        self.styles.add(ParagraphStyle(
-            name='Footer',
-            fontSize=9,
-            leading=10,
-            alignment=2
-        ))
-
-    def add_header(self, company_info):
-        """Adiciona cabeçalho com informações da empresa"""
-        # Adicionar logo se existir
-        if os.path.exists('assets/logo.png'):
-            logo = Image('assets/logo.png', width=1.5*inch, height=0.5*inch)
-            self.elements.append(logo)
-        
-        # Informações da empresa
-        company_name = Paragraph(company_info['name'], self.styles['CompanyName'])
-        self.elements.append(company_name)
-        
-        address = Paragraph(
-            f"{company_info['address']}<br/>{company_info['city']}/{company_info['state']} - CEP: {company_info['cep']}",
-            self.styles['EmployeeInfo']
-        )
-        self.elements.append(address)
-        
-        cnpj = Paragraph(f"CNPJ: {company_info['cnpj']}", self.styles['EmployeeInfo'])
-        self.elements.append(cnpj)
-        
-        self.elements.append(Spacer(1, 0.25*inch))
+        self.story = []
+        self.styles = get_styles()
+
+    def add_header(self, company_info=COMPANY_INFO, title=None):
+        self.story.extend(header_flowables(company_info, title))
 
     def add_report_title(self, title, period):
-        """Adiciona título do relatório e período"""
-        title = Paragraph(title, self.styles['ReportTitle'])
-        self.elements.append(title)
-        
-        period_text = Paragraph(
-            f"Período: {period['start']} a {period['end']}<br/>Emissão: {datetime.now().strftime('%d/%m/%Y')}",
-            self.styles['EmployeeInfo']
-        )
-        self.elements.append(period_text)
-        
-        self.elements.append(Spacer(1, 0.25*inch))
-
-    def add_employee_info(self, employee_data):
-        """Adiciona informações do funcionário"""
-        info_lines = [
-            f"<b>Funcionário:</b> {employee_data['name']}",
-            f"<b>Departamento:</b> {employee_data['department']}",
-            f"<b>Matrícula:</b> {employee_data['id']}",
-            f"<b>Data de admissão:</b> {employee_data['admission_date']}",
-            f"<b>Cargo:</b> {employee_data['position']}",
-            f"<b>CTPS:</b> {employee_data['ctps']}",
-            f"<b>PIS:</b> {employee_data['pis']}"
-        ]
-        
-        for line in info_lines:
-            p = Paragraph(line, self.styles['EmployeeInfo'])
-            self.elements.append(p)
-        
-        self.elements.append(Spacer(1, 0.25*inch))
-
-    def add_time_table(self, data):
-        """Adiciona tabela de registros de ponto"""
-        # Cabeçalho da tabela
-        header = [
-            "Dia", "Turno", "Ent. 1", "Saí. 1", 
-            "Ent. 2", "Saí. 2", "Horas", "Observações"
+        if title:
+            self.story.append(Paragraph(title, self.styles['Header1']))
+        self.add_period(period)
+
+    def add_period(self, period):
+        self.story.extend([
+            Paragraph(f"Período: {period['start']} a {period['end']}",
+                      self.styles['NormalCenter']),
+            Spacer(1, 0.3*inch)
+        ])
+
+    def add_employee_info(self, employee_info):
+        info = [
+            Paragraph("<b>INFORMAÇÕES DO FUNCIONÁRIO</b>", self.styles['Header2']),
+            Paragraph(f"<b>Nome:</b> {employee_info['name']}", self.styles['Normal']),
+            Paragraph(f"<b>Matrícula:</b> {employee_info['id']}", self.styles['Normal']),
+            Paragraph(f"<b>Departamento:</b> {employee_info['department']}", self.styles['Normal']),
+            Paragraph(f"<b>Cargo:</b> {employee_info['position']}", self.styles['Normal']),
+            Paragraph(f"<b>Data de Admissão:</b> {employee_info['admission_date']}", self.styles['Normal']),
+            Paragraph(f"<b>CTPS:</b> {employee_info['ctps']}", self.styles['Normal']),
+            Paragraph(f"<b>PIS:</b> {employee_info['pis']}", self.styles['Normal']),
+            Spacer(1, 0.3*inch)
         ]
-        
-        # Converter dados para formato de tabela
-        table_data = [header]
-        for row in data:
-            table_data.append([
-                row['day'],
-                row['shift'],
-                row['entry1'],
-                row['exit1'],
-                row['entry2'],
-                row['exit2'],
-                row['hours'],
-                row['notes']
-            ])
-        
-        # Criar tabela
-        table = Table(table_data, colWidths=[0.8*inch, 1.2*inch] + [0.6*inch]*5 + [1.2*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.white),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 8),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.lightgrey),
-            ('FONTSIZE', (0, 1), (-1, -1), 7),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ]))
-        
-        self.elements.append(table)
-        self.elements.append(Spacer(1, 0.25*inch))
+        self.story.extend(info)
+
+    def add_time_table(self, table_data):
+        rows = [[
+            row['day'],
+            row['entry1'],
+            row['exit1'],
+            row['entry2'],
+            row['exit2'],
+            row['hours'],
+            row['notes']
+        ] for row in table_data]
+
+        self.story.append(Spacer(1, 0.2*inch))
+        for start in range(0, max(len(rows), 1), TABLE_CHUNK_ROWS):
+            data = [TIME_TABLE_HEADER] + rows[start:start + TABLE_CHUNK_ROWS]
+            self.story.append(Table(data, colWidths=TIME_TABLE_WIDTHS, style=TIME_TABLE_STYLE,
+                                    repeatRows=1))
+        self.story.append(Spacer(1, 0.3*inch))
 
     def add_summary(self, summary_data):
         """Adiciona resumo mensal"""
@@ -167,61 +204,70 @@ class PDFGenerator:
             f"<b>Faltas:</b> {summary_data['absences']}",
             f"<b>Atrasos:</b> {summary_data['delays']}"
         ]
-        
-        for line in summary_lines:
-            p = Paragraph(line, self.styles['EmployeeInfo'])
-            self.elements.append(p)
-        
-        self.elements.append(Spacer(1, 0.25*inch))
+        self.story.extend(Paragraph(line, self.styles['Normal']) for line in summary_lines)
+        self.story.append(Spacer(1, 0.25*inch))
 
     def add_salary_info(self, salary_data):
-        """Adiciona informações salariais"""
-        salary_lines = [
-            "<b>Cálculo Salarial:</b>",
-            f"Salário Bruto: R$ {locale.currency(salary_data['bruto'], grouping=True, symbol=False)}",
-            f"INSS: R$ {locale.currency(salary_data['inss'], grouping=True, symbol=False)}",
-            f"IRRF: R$ {locale.currency(salary_data['irrf'], grouping=True, symbol=False)}",
-            f"Salário Líquido: R$ {locale.currency(salary_data['liquido'], grouping=True, symbol=False)}",
-            f"Proporcional ({salary_data['worked_days']} dias): R$ {locale.currency(salary_data['proporcional'], grouping=True, symbol=False)}"
+        salary_info = [
+            Paragraph("<b>RESUMO SALARIAL</b>", self.styles['Header2']),
+            Spacer(1, 0.2*inch),
+            Paragraph(f"<b>Salário Bruto:</b> R$ {salary_data['bruto']:,.2f}", self.styles['Normal']),
+            Paragraph(f"<b>Proporcional ({salary_data['worked_days']} dias):</b> R$ {salary_data['proporcional']:,.2f}", self.styles['Normal']),
+            Paragraph(f"<b>Horas Extras:</b> R$ {salary_data['horas_extras']:,.2f}", self.styles['Normal']),
+            Paragraph(f"<b>Adicional Noturno:</b> R$ {salary_data['adicional_noturno']:,.2f}", self.styles['Normal']),
+            Paragraph(f"<b>Outros Benefícios:</b> R$ {salary_data['outros_beneficios']:,.2f}", self.styles['Normal']),
+            Paragraph(f"<b>Total de Vencimentos:</b> R$ {salary_data['total_vencimentos']:,.2f}", self.styles['Normal']),
+            Spacer(1, 0.2*inch),
+            Paragraph(f"<b>Desconto INSS:</b> R$ {salary_data['inss']:,.2f}", self.styles['Normal']),
+            Paragraph(f"<b>Desconto IRRF:</b> R$ {salary_data['irrf']:,.2f}", self.styles['Normal']),
+            Paragraph(f"<b>Outros Descontos:</b> R$ {salary_data['outros_descontos']:,.2f}", self.styles['Normal']),
+            Paragraph(f"<b>Total de Descontos:</b> R$ {salary_data['total_descontos']:,.2f}", self.styles['Normal']),
+            Spacer(1, 0.2*inch),
+            Paragraph(f"<b>Salário Líquido:</b> R$ {salary_data['liquido']:,.2f}", self.styles['Normal']),
         ]
-        
-        for line in salary_lines:
-            p = Paragraph(line, self.styles['EmployeeInfo'])
-            self.elements.append(p)
-        
-        self.elements.append(Spacer(1, 0.25*inch))
+        self.story.extend(salary_info)
 
     def add_footer(self, employee_name):
         """Adiciona rodapé com assinatura"""
-        self.elements.append(Spacer(1, 0.5*inch))
-        self.elements.append(Paragraph("Confirmo as informações acima.", self.styles['EmployeeInfo']))
-        
-        date_info = Paragraph(f"Data: {datetime.now().strftime('%d/%m/%Y')}", self.styles['EmployeeInfo'])
-        signature_line = "_" * 30
-        signature = Paragraph(f"{signature_line}<br/>{employee_name}", self.styles['EmployeeInfo'])
-        
-        col_widths = [3*inch, 3*inch]
-        footer_table = Table([[date_info, signature]], colWidths=col_widths)
-        self.elements.append(footer_table)
-
-    def generate(self):
-        """Gera o documento PDF"""
-        self.doc.build(self.elements)
-        return self.filename
+        self.story.append(Spacer(1, 0.5*inch))
+        self.story.append(Paragraph("Confirmo as informações acima.", self.styles['Normal']))
+
+        date_info = Paragraph(f"Data: {datetime.now().strftime('%d/%m/%Y')}", self.styles['Normal'])
+        signature = Paragraph(f"{'_' * 30}<br/>{employee_name}", self.styles['Normal'])
+        self.story.append(Table([[date_info, signature]], colWidths=[3*inch, 3*inch]))
+
+    def add_page_break(self):
+        self.story.append(PageBreak())
+
+    def generate(self, output=None):
+        """Renderiza o documento em ``output`` (caminho ou arquivo aberto).
+
+        Sem ``output`` retorna um BytesIO com o PDF, posicionado no início.
+        """
+        if output is None:
+            output = BytesIO()
+        doc = SimpleDocTemplate(output, pagesize=letter)
+        doc.build(self.story)
+        if hasattr(output, 'seek'):
+            output.seek(0)
+        return output
+
+    def generate_file(self):
+        """Renderiza em um arquivo temporário e retorna o arquivo aberto, no início"""
+        output = tempfile.TemporaryFile()
+        try:
+            return self.generate(output)
+        except Exception:
+            output.close()
+            raise
+
 
 # Exemplo de uso
 if __name__ == "__main__":
-    # Dados de exemplo
-    company_info = {
-        'name': 'Imobiliaria Celeste LTDA EPP',
-        'address': 'Rua das Aroeiras, 617',
-        'city': 'Sinop',
-        'state': 'MT',
-        'cep': '78550-224',
-        'cnpj': '04.052.691/0001-28'
-    }
-    
-    employee_data = {
+    pdf = PDFGenerator("relatorio_ponto.pdf")
+    pdf.add_header(COMPANY_INFO, REPORT_TITLE)
+    pdf.add_period({'start': '01/05/2025', 'end': '31/05/2025'})
+    pdf.add_employee_info({
         'name': 'Alliabson Lourenço da Fonseca',
         'department': 'Geral',
         'id': '146',
@@ -229,22 +275,10 @@ if __name__ == "__main__":
         'position': 'AUXILIAR ADMINISTRATIVO',
         'ctps': '71840',
         'pis': '203.68460.25-2'
-    }
-    
-    # Gerar PDF
-    pdf = PDFGenerator("relatorio_ponto.pdf")
-    pdf.add_header(company_info)
-    pdf.add_report_title("Relatório de Frequência Individual", {
-        'start': '01/05/2025',
-        'end': '31/05/2025'
     })
-    pdf.add_employee_info(employee_data)
-    
-    # Adicionar dados de exemplo à tabela
-    sample_data = [
+    pdf.add_time_table([
         {
             'day': '01/05 Qui',
-            'shift': '07:12 10:30 12:00 17:30',
             'entry1': '07:12',
             'exit1': '10:30',
             'entry2': '12:00',
@@ -254,7 +288,6 @@ if __name__ == "__main__":
         },
         {
             'day': '02/05 Sex',
-            'shift': '07:12 10:30 12:00 17:30',
             'entry1': '07:12',
             'exit1': '10:30',
             'entry2': '12:00',
@@ -262,24 +295,14 @@ if __name__ == "__main__":
             'hours': '08:48',
             'notes': 'Entr. Atrasada(*)'
         }
-    ]
-    pdf.add_time_table(sample_data)
-    
+    ])
     pdf.add_summary({
         'total_hours': '177:42',
         'worked_days': 22,
         'absences': 0,
         'delays': 5
     })
-    
-    pdf.add_salary_info({
-        'bruto': 2500.00,
-        'inss': 225.00,
-        'irrf': 142.80,
-        'liquido': 2132.20,
-        'proporcional': 2500.00,
-        'worked_days': 22
-    })
-    
-    pdf.add_footer(employee_data['name'])
-    pdf.generate()
+    pdf.add_footer('Alliabson Lourenço da Fonseca')
+
+    with open(pdf.filename, 'wb') as f:
+        f.write(pdf.generate().getvalue())
@@ -0,0 +1,255 @@
+"""Motor vetorizado de cálculo das marcações de ponto.
+
+Calcula as colunas ``Horas`` e ``Observações`` de um DataFrame inteiro de
+marcações (um funcionário no mês ou a empresa toda) em uma única passada
+sobre arrays de minutos inteiros.
+
+Internamente os horários são minutos inteiros (int16, com ``MISSING`` para
+marcação ausente): as funções aceitam tanto colunas já convertidas quanto
+as strings "HH:MM" da tela e dos arquivos CSV, e ``format_minutes`` só é
+usada na saída para a interface, o PDF e o CSV.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from utils.metrics import timed
+
+TIME_PATTERN = re.compile(r'^([0-1]?[0-9]|2[0-3]):[0-5][0-9]$')
+EMPTY_TIME = "--:--"
+PUNCH_COLUMNS = ['Ent. 1', 'Saí. 1', 'Ent. 2', 'Saí. 2']
+DEFAULT_SHIFT = "07:12 10:30 12:00 17:30"
+OFF_SHIFT = "--:-- --:-- --:-- --:--"
+# Abreviações do ``Dia`` ("02/06 SEG"), fixas para não depender do locale do servidor
+WEEKDAY_LABELS = np.array(['SEG', 'TER', 'QUA', 'QUI', 'SEX', 'SÁB', 'DOM'], dtype=object)
+
+# Sentinela para marcação ausente ou inválida (cabe em int16)
+MISSING = int(np.iinfo(np.int16).min)
+
+# Tabela "HH:MM" pré-formatada para qualquer saldo possível entre marcações
+# (divmod: -90 minutos vira "-2:30")
+_FORMAT_OFFSET = 3 * 24 * 60
+_FORMATTED = np.array(
+    [f"{m // 60:02d}:{m % 60:02d}" for m in range(-_FORMAT_OFFSET, _FORMAT_OFFSET + 1)],
+    dtype=object
+)
+
+_OBSERVATION_LABELS = [
+    ('late_in', "Entrada atrasada"),
+    ('early_out', "Saída antecipada"),
+    ('late_return', "Retorno atrasado"),
+    ('early_final', "Saída final antecipada"),
+]
+
+
+def format_minutes(minutes):
+    """Formata um array de minutos como strings "HH:MM" """
+    return _FORMATTED[np.asarray(minutes, dtype=np.int64) + _FORMAT_OFFSET]
+
+
+def _parse_punch(value):
+    if not isinstance(value, str) or not value or value == EMPTY_TIME:
+        return MISSING
+    if not TIME_PATTERN.match(value):
+        return MISSING
+    h, m = map(int, value.split(':'))
+    return h * 60 + m
+
+
+def _parse_shift(turno):
+    if not isinstance(turno, str):
+        return [MISSING] * 4
+    parts = turno.split()
+    expected = []
+    for i in range(4):
+        if len(parts) > i and parts[i] != EMPTY_TIME:
+            h, m = map(int, parts[i].split(':'))
+            expected.append(h * 60 + m)
+        else:
+            expected.append(MISSING)
+    return expected
+
+
+def _lookup(series, parser, width=None):
+    """Converte uma coluna de strings em minutos, interpretando cada valor distinto uma única vez"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    parsed = [parser(value) for value in uniques]
+    missing = [MISSING] * width if width else MISSING
+    table = np.array(parsed + [missing], dtype=np.int32)
+    # Código -1 (valor nulo) aponta para a última linha da tabela: ausente
+    return table[codes]
+
+
+def is_minutes(series):
+    """Indica se a coluna já está em minutos inteiros"""
+    return pd.api.types.is_integer_dtype(series)
+
+
+def punch_minutes(series):
+    """Converte uma coluna de marcações "HH:MM" em minutos do dia (MISSING quando inválida)"""
+    if is_minutes(series):
+        return np.asarray(series, dtype=np.int32)
+    return _lookup(series, _parse_punch)
+
+
+def _parse_duration(value):
+    """Converte "HH:MM" (inclusive saldo negativo como "-1:30") em minutos"""
+    try:
+        h, m = map(int, value.split(':'))
+        return h * 60 + m
+    except (AttributeError, ValueError):
+        return MISSING
+
+
+def duration_minutes(series):
+    """Converte a coluna ``Horas`` em minutos int16 (MISSING quando inválida)"""
+    if is_minutes(series):
+        return np.asarray(series, dtype=np.int16)
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    table = np.array([_parse_duration(value) for value in uniques] + [MISSING], dtype=np.int16)
+    return table[codes]
+
+
+def punched_days_mask(df):
+    """Linhas com ao menos uma marcação válida"""
+    punches = np.column_stack([punch_minutes(df[col]) for col in PUNCH_COLUMNS])
+    return (punches != MISSING).any(axis=1)
+
+
+def worked_days_mask(horas):
+    """Dias com ``Horas`` diferente de zero ("00:00"), como no resumo mensal"""
+    if is_minutes(horas):
+        return np.asarray(horas) != 0
+    return np.asarray(horas != "00:00")
+
+
+def shift_minutes(series):
+    """Converte a coluna ``Turno`` em uma matriz (n, 4) de minutos esperados"""
+    return _lookup(series, _parse_shift, width=4).reshape(len(series), 4)
+
+
+def punch_metrics(df, expected=None):
+    """Calcula, em minutos, as métricas diárias de cada linha de marcações.
+
+    ``expected`` é a matriz (linhas, 4) de horários esperados, por exemplo
+    de uma escala compilada em utils.shifts; sem ela, a coluna ``Turno`` é
+    interpretada. Retorna um DataFrame com o mesmo índice de ``df`` e as
+    colunas ``worked``, ``late_in``, ``early_out``, ``late_return``,
+    ``early_final`` e ``balance`` (saldo em relação à jornada do turno;
+    zero quando o dia não tem entrada e saída final registradas).
+    """
+    punches = np.column_stack([punch_minutes(df[col]) for col in PUNCH_COLUMNS])
+    if expected is None:
+        expected = shift_minutes(df['Turno'])
+    expected = np.asarray(expected, dtype=np.int32)
+
+    present = punches != MISSING
+    compared = present & (expected != MISSING)
+    delta = punches - expected
+
+    worked = np.where(
+        present.all(axis=1),
+        (punches[:, 1] - punches[:, 0]) + (punches[:, 3] - punches[:, 2]),
+        0
+    )
+    closed = present[:, 0] & present[:, 3]
+    # Jornada do turno; dias sem turno completo (folga) não têm jornada esperada
+    day_minutes = np.where(
+        (expected != MISSING).all(axis=1),
+        (expected[:, 1] - expected[:, 0]) + (expected[:, 3] - expected[:, 2]),
+        0
+    )
+
+    return pd.DataFrame({
+        'worked': worked,
+        'late_in': np.where(compared[:, 0] & (delta[:, 0] > 0), delta[:, 0], 0),
+        'early_out': np.where(compared[:, 1] & (delta[:, 1] < 0), -delta[:, 1], 0),
+        'late_return': np.where(compared[:, 2] & (delta[:, 2] > 0), delta[:, 2], 0),
+        'early_final': np.where(compared[:, 3] & (delta[:, 3] < 0), -delta[:, 3], 0),
+        'balance': np.where(closed, worked - day_minutes, 0),
+    }, index=df.index)
+
+
+def observations_from_metrics(metrics):
+    """Monta a coluna ``Observações`` a partir das métricas de punch_metrics"""
+    observations = np.full(len(metrics), "", dtype=object)
+    for column, label in _OBSERVATION_LABELS:
+        minutes = metrics[column].to_numpy()
+        observations = observations + np.where(
+            minutes > 0, ", " + label + " (" + format_minutes(minutes) + ")", ""
+        )
+
+    balance = metrics['balance'].to_numpy()
+    observations = observations + np.where(
+        balance > 0, ", Horas extras (" + format_minutes(balance) + ")", ""
+    )
+    observations = observations + np.where(
+        balance < 0, ", Horas faltantes (" + format_minutes(-balance) + ")", ""
+    )
+    return np.array([obs[2:] for obs in observations], dtype=object)
+
+
+@timed()
+def calculate_period_hours(df, expected=None):
+    """Calcula ``Horas`` e ``Observações`` para todas as linhas de ``df`` de uma vez.
+
+    Interpreta cada horário distinto uma única vez (ou usa direto as colunas
+    já em minutos) e faz as contas sobre arrays NumPy.
+    """
+    metrics = punch_metrics(df, expected)
+    return pd.DataFrame({
+        'Horas': format_minutes(metrics['worked'].to_numpy()),
+        'Observações': observations_from_metrics(metrics),
+    }, index=df.index)
+
+
+def day_labels(dates):
+    """Textos da coluna ``Dia`` ("DD/MM SEG") para as datas"""
+    dates = pd.DatetimeIndex(dates)
+    return np.asarray(dates.strftime('%d/%m'), dtype=object) + ' ' + WEEKDAY_LABELS[dates.weekday]
+
+
+def build_period_frame(periodo_inicio, periodo_fim, existing_records=None, schedule=None):
+    """Monta a tabela diária do período, preenchida com os registros já salvos.
+
+    ``schedule`` (utils.shifts.CompiledSchedule do período) define o
+    ``Turno`` e os dias com expediente; sem ela vale DEFAULT_SHIFT de
+    segunda a sexta. Os registros existentes são indexados uma única vez
+    pelo prefixo "DD/MM" do ``Dia`` (vale a primeira ocorrência) e alinhados
+    às datas do período com um reindex, em vez de uma busca por dia. Dias
+    sem expediente começam vazios, a não ser que tenham marcações gravadas
+    (fim de semana ou feriado trabalhado, por exemplo vindo da importação).
+    """
+    dates = pd.date_range(start=periodo_inicio, end=periodo_fim)
+    day_keys = dates.strftime('%d/%m')
+    if schedule is not None:
+        work_day = np.array(schedule.work_day)
+        turno = np.array(schedule.turno)
+    else:
+        work_day = np.asarray(dates.weekday < 5)
+        turno = np.where(work_day, DEFAULT_SHIFT, OFF_SHIFT).astype(object)
+
+    frame = pd.DataFrame({
+        'Dia': day_labels(dates),
+        'Turno': turno,
+    })
+    defaults = {col: EMPTY_TIME for col in PUNCH_COLUMNS}
+    defaults.update({'Horas': "00:00", 'Observações': ""})
+
+    found = None
+    if existing_records is not None and not existing_records.empty:
+        by_day = existing_records.assign(_dia=existing_records['Dia'].str[:5]) \
+            .drop_duplicates('_dia') \
+            .set_index('_dia')
+        found = by_day.reindex(day_keys)
+        stored = np.asarray(day_keys.isin(by_day.index))
+        punched = pd.Series(punched_days_mask(by_day), index=by_day.index).reindex(day_keys, fill_value=False)
+        work_day = (work_day & stored) | punched.to_numpy(dtype=bool)
+
+    for col, default in defaults.items():
+        values = np.full(len(dates), default, dtype=object)
+        if found is not None:
+            values[work_day] = found[col].to_numpy(dtype=object)[work_day]
+        frame[col] = values
+    return frame
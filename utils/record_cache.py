@@ -0,0 +1,89 @@
+"""Cache em memória dos registros de ponto, compartilhado entre sessões.
+
+Uma única instância por processo (criada pela aplicação com
+``st.cache_resource``) guarda a cópia já interpretada dos registros e
+fatias por matrícula, com descarte LRU. Os registros ficam na representação
+tipada de encode_records (horários em minutos int16, textos repetidos como
+categorias); ``load(encoded=True)`` os entrega assim para os cálculos, e o
+padrão converte de volta para as strings "HH:MM" da tela. O cache é invalidado quando a
+assinatura dos arquivos (mtime/tamanho) muda ou quando ``bump`` é chamado
+após uma gravação.
+
+Os DataFrames devolvidos são compartilhados: não devem ser modificados.
+"""
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from utils.storage import decode_records, encode_records, filter_period
+
+MAX_CACHED_EMPLOYEES = 128
+
+
+class RecordCache:
+    """Cache dos registros de um RecordStore com fatias por matrícula"""
+
+    def __init__(self, store, max_slices=MAX_CACHED_EMPLOYEES):
+        self.store = store
+        self.max_slices = max_slices
+        self._lock = threading.RLock()
+        self._generation = 0
+        self._version = None
+        self._frame = None
+        self._slices = OrderedDict()
+
+    @property
+    def generation(self):
+        return self._generation
+
+    def bump(self):
+        """Registra uma gravação: as próximas leituras voltam ao disco"""
+        with self._lock:
+            self._generation += 1
+
+    def _validate(self):
+        version = (self._generation, self.store.signature())
+        if version != self._version:
+            self._version = version
+            self._frame = None
+            self._slices.clear()
+
+    def load(self, matricula=None, encoded=False):
+        """Todos os registros, ou os de uma matrícula"""
+        if matricula is not None:
+            return self._output(self._load_slice(str(matricula)), encoded)
+        with self._lock:
+            self._validate()
+            if self._frame is None:
+                self._frame = encode_records(self.store.load()) if self.store.exists() else pd.DataFrame()
+            return self._output(self._frame, encoded)
+
+    @staticmethod
+    def _output(records, encoded):
+        return records if encoded else decode_records(records.copy())
+
+    def _load_slice(self, matricula):
+        with self._lock:
+            self._validate()
+            if matricula in self._slices:
+                self._slices.move_to_end(matricula)
+                return self._slices[matricula]
+
+            if self._frame is not None:
+                records = self._frame[self._frame['matricula'].astype(str) == matricula] \
+                    if not self._frame.empty else self._frame
+            elif self.store.exists():
+                records = encode_records(self.store.load(matricula=matricula))
+            else:
+                records = pd.DataFrame()
+
+            self._slices[matricula] = records
+            while len(self._slices) > self.max_slices:
+                self._slices.popitem(last=False)
+            return records
+
+    def load_period(self, matricula, periodo_inicio, periodo_fim, encoded=False):
+        """Registros de uma matrícula em um período, a partir da fatia em cache"""
+        records = filter_period(self._load_slice(str(matricula)), periodo_inicio, periodo_fim)
+        return self._output(records, encoded)
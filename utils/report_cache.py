@@ -0,0 +1,106 @@
+"""Cache em disco dos relatórios PDF gerados.
+
+Cada PDF é gravado como ``<matrícula>-<sha256>.pdf``, onde o hash cobre os
+dados do funcionário, as marcações do período, o resumo salarial e
+TEMPLATE_VERSION. Um relatório igual ao último gerado é servido direto do
+disco; qualquer mudança nesses dados gera outra chave. ``invalidate``
+descarta os relatórios de uma matrícula quando os registros dela são
+gravados, e o diretório é mantido abaixo de ``max_bytes`` descartando os
+arquivos usados há mais tempo (mtime atualizado a cada acerto).
+
+A instância guarda apenas o caminho e o limite, então pode ser enviada aos
+processos de trabalho de utils.reports.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from utils.reports import PONTO_COLUMNS, TEMPLATE_VERSION
+
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def _safe_name(matricula):
+    return re.sub(r'[^0-9A-Za-z_.]', '_', str(matricula))
+
+
+def report_key(employee_data, ponto_data, salary_data=None):
+    """Hash sha256 do conteúdo de um relatório"""
+    if hasattr(ponto_data, 'to_dict'):
+        ponto_data = ponto_data.to_dict('records')
+    content = {
+        'template': TEMPLATE_VERSION,
+        'employee': dict(employee_data),
+        'ponto': [[row.get(col) for col in PONTO_COLUMNS] for row in ponto_data],
+        'salary': dict(salary_data) if salary_data else None,
+    }
+    payload = json.dumps(content, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ReportCache:
+    """Diretório de PDFs endereçados pelo conteúdo, com descarte LRU por tamanho"""
+
+    def __init__(self, directory, max_bytes=MAX_CACHE_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    def path_for(self, matricula, key):
+        return self.directory / f"{_safe_name(matricula)}-{key}.pdf"
+
+    def get(self, matricula, key):
+        """Bytes do PDF em cache, ou None"""
+        path = self.path_for(matricula, key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def put(self, matricula, key, data):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp, self.path_for(matricula, key))
+        except Exception:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def get_or_render(self, employee_data, ponto_data, salary_data, render):
+        """Retorna o PDF do cache ou chama ``render()`` (que deve retornar bytes) e guarda o resultado"""
+        matricula = employee_data['matricula']
+        key = report_key(employee_data, ponto_data, salary_data)
+        data = self.get(matricula, key)
+        if data is None:
+            data = render()
+            self.put(matricula, key, data)
+        return data
+
+    def invalidate(self, matricula):
+        """Remove os relatórios em cache de uma matrícula"""
+        for path in self.directory.glob(f"{_safe_name(matricula)}-*.pdf"):
+            path.unlink(missing_ok=True)
+
+    def evict(self):
+        """Descarta os arquivos menos usados até caber em ``max_bytes``"""
+        entries = []
+        for path in self.directory.glob("*.pdf"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
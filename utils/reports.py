@@ -0,0 +1,184 @@
+"""Relatórios de Frequência Individual em PDF.
+
+``build_report_pdf`` monta o relatório de um funcionário e
+``build_reports_file`` junta vários funcionários-período (um ano inteiro, a
+empresa toda) em um único PDF gravado em arquivo temporário. Para o fechamento
+do mês, ``build_reports_zip`` gera os relatórios de todos os
+funcionários-período em paralelo com um ``ProcessPoolExecutor`` (o layout do
+ReportLab é CPU-bound e single-threaded) e grava cada PDF no ZIP assim que
+ele fica pronto.
+
+Este módulo não depende do Streamlit: os processos de trabalho importam
+apenas ele. O ReportLab (utils.pdf_generator) só é importado quando um PDF é
+de fato montado, para não pesar na inicialização da aplicação.
+"""
+import multiprocessing
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+from utils.metrics import timed
+from utils.schema import PERIOD_KEY
+from utils.storage import decode_records
+
+EMPLOYEE_FIELDS = ['nome', 'departamento', 'cargo', 'salario_bruto']
+PONTO_COLUMNS = ['Dia', 'Turno', 'Ent. 1', 'Saí. 1', 'Ent. 2', 'Saí. 2', 'Horas', 'Observações']
+SALARY_FIELDS = ['bruto', 'proporcional', 'adicional_noturno', 'horas_extras', 'outros_beneficios',
+                 'total_vencimentos', 'inss', 'irrf', 'outros_descontos', 'total_descontos',
+                 'liquido', 'worked_days']
+
+# Incrementar sempre que o layout de utils.pdf_generator mudar: invalida os PDFs
+# em cache (utils.report_cache)
+TEMPLATE_VERSION = 1
+
+# "spawn" evita herdar as threads do servidor do Streamlit nos processos filhos
+MP_CONTEXT = "spawn"
+
+
+def add_report(pdf, employee_data, ponto_data, salary_data=None):
+    """Acrescenta ao ``pdf`` o Relatório de Frequência Individual de um funcionário-período.
+
+    ``ponto_data`` pode ser o DataFrame da tabela de ponto ou uma lista de
+    dicionários com as mesmas colunas.
+    """
+    from utils.pdf_generator import COMPANY_INFO, REPORT_TITLE
+
+    employee_pdf_data = {
+        'name': employee_data['nome'],
+        'department': employee_data.get('departamento', 'Geral'),
+        'id': employee_data['matricula'],
+        'admission_date': employee_data.get('admission_date', '17/05/2017'),
+        'position': employee_data.get('cargo', 'AUXILIAR ADMINISTRATIVO'),
+        'ctps': employee_data.get('ctps', '71840'),
+        'pis': employee_data.get('pis', '203.68460.25-2')
+    }
+
+    pdf.add_header(COMPANY_INFO, REPORT_TITLE)
+    pdf.add_period({
+        'start': employee_data['periodo_inicio'].strftime('%d/%m/%Y'),
+        'end': employee_data['periodo_fim'].strftime('%d/%m/%Y')
+    })
+    pdf.add_employee_info(employee_pdf_data)
+
+    if hasattr(ponto_data, 'to_dict'):
+        ponto_data = ponto_data.to_dict('records')
+    table_data = [{
+        'day': row['Dia'],
+        'shift': row['Turno'],
+        'entry1': row['Ent. 1'],
+        'exit1': row['Saí. 1'],
+        'entry2': row['Ent. 2'],
+        'exit2': row['Saí. 2'],
+        'hours': row['Horas'],
+        'notes': row['Observações']
+    } for row in ponto_data]
+
+    pdf.add_time_table(table_data)
+
+    if salary_data:
+        pdf.add_salary_info(salary_data)
+
+
+@timed()
+def build_report_pdf(employee_data, ponto_data, salary_data=None):
+    """Monta o Relatório de Frequência Individual e retorna um BytesIO com o PDF"""
+    from utils.pdf_generator import PDFGenerator
+
+    pdf = PDFGenerator("relatorio_ponto.pdf")
+    add_report(pdf, employee_data, ponto_data, salary_data)
+    return pdf.generate()
+
+
+def cached_report_pdf(cache, employee_data, ponto_data, salary_data=None):
+    """Como build_report_pdf, mas retorna bytes e reaproveita o ReportCache quando houver"""
+    def render():
+        return build_report_pdf(employee_data, ponto_data, salary_data).getvalue()
+
+    if cache is None:
+        return render()
+    return cache.get_or_render(employee_data, ponto_data, salary_data, render)
+
+
+def report_filename(employee_data):
+    return f"relatorio_{employee_data['matricula']}_{employee_data['periodo_inicio'].strftime('%Y_%m_%d')}.pdf"
+
+
+def report_jobs(records, payroll=None):
+    """Quebra os registros em um job por funcionário-período.
+
+    Cada job é uma tupla ``(employee_data, ponto_rows, salary_data)`` só com
+    tipos simples, barata de serializar para os processos de trabalho.
+    ``payroll`` (saída de calculate_payroll junto com as chaves do período)
+    fornece o resumo salarial de cada relatório. Horários em minutos são
+    formatados aqui, na saída para o PDF.
+    """
+    salaries = {}
+    if payroll is not None:
+        for row in payroll.to_dict('records'):
+            key = tuple(row[k] for k in PERIOD_KEY)
+            salaries[key] = {field: row[field] for field in SALARY_FIELDS}
+
+    ponto_columns = [col for col in PONTO_COLUMNS if col in records.columns]
+    employee_fields = [col for col in EMPLOYEE_FIELDS if col in records.columns]
+
+    jobs = []
+    for key, group in records.groupby(PERIOD_KEY, observed=True, sort=True):
+        last = group.iloc[-1]
+        employee_data = dict(zip(PERIOD_KEY, key))
+        employee_data.update({field: last[field] for field in employee_fields})
+        ponto = decode_records(group.drop_duplicates('Dia', keep='first')[ponto_columns])
+        ponto_rows = ponto.fillna("").to_dict('records')
+        jobs.append((employee_data, ponto_rows, salaries.get(key)))
+    return jobs
+
+
+def _render_job(job, cache=None):
+    employee_data, ponto_rows, salary_data = job
+    return report_filename(employee_data), cached_report_pdf(cache, employee_data, ponto_rows, salary_data)
+
+
+def generate_reports(jobs, max_workers=None, cache=None):
+    """Renderiza os jobs em paralelo, gerando ``(nome_arquivo, bytes)`` conforme terminam.
+
+    Com um único job ou ``max_workers=1`` renderiza no próprio processo.
+    Com ``cache`` (um ReportCache), relatórios inalterados saem do disco.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(jobs) <= 1:
+        for job in jobs:
+            yield _render_job(job, cache)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(max_workers, len(jobs)),
+                             mp_context=multiprocessing.get_context(MP_CONTEXT)) as executor:
+        futures = [executor.submit(_render_job, job, cache) for job in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+@timed()
+def build_reports_zip(records, payroll=None, max_workers=None, cache=None):
+    """Gera os relatórios de todos os funcionários-período de ``records`` em um ZIP (bytes)"""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for filename, pdf_bytes in generate_reports(report_jobs(records, payroll), max_workers, cache):
+            archive.writestr(filename, pdf_bytes)
+    return buffer.getvalue()
+
+
+@timed()
+def build_reports_file(records, payroll=None):
+    """Junta os relatórios de todos os funcionários-período de ``records`` em um único PDF.
+
+    Cada relatório começa em uma nova página. Retorna um arquivo temporário
+    aberto e posicionado no início (fechá-lo apaga o arquivo).
+    """
+    from utils.pdf_generator import PDFGenerator
+
+    pdf = PDFGenerator("relatorios.pdf")
+    for i, (employee_data, ponto_rows, salary_data) in enumerate(report_jobs(records, payroll)):
+        if i:
+            pdf.add_page_break()
+        add_report(pdf, employee_data, ponto_rows, salary_data)
+    return pdf.generate_file()
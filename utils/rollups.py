@@ -0,0 +1,195 @@
+"""Totais de frequência pré-agregados para o painel da empresa.
+
+Duas tabelas materializadas em ``data/rollups/``:
+
+- ``periods.csv``: uma linha por funcionário-período, com minutos
+  trabalhados, horas extras, atrasos, dias trabalhados, dias úteis e faltas;
+- ``departments.csv``: os mesmos totais somados por departamento e mês
+  (mês de ``periodo_inicio``).
+
+A cada gravação ``update`` recalcula só os períodos gravados e aplica a
+diferença (novo - antigo) aos totais do departamento, de modo que abrir o
+painel é ler uma tabela de tamanho departamentos x meses, independente de
+quantos funcionários e meses estão gravados. Os registros são lidos sob o
+lock das tabelas: quem atualiza por último usa os registros mais recentes.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.punch_engine import MISSING, duration_minutes, punch_metrics, worked_days_mask
+from utils.shifts import get_shift_registry
+from utils.schema import PERIOD_KEY
+from utils.storage import path_lock
+
+TOTAL_COLUMNS = ['minutos_trabalhados', 'minutos_extras', 'minutos_atraso',
+                 'dias_trabalhados', 'dias_uteis', 'faltas']
+PERIOD_ROLLUP_COLUMNS = PERIOD_KEY + ['departamento', 'mes'] + TOTAL_COLUMNS
+DEPARTMENT_KEY = ['departamento', 'mes']
+DEFAULT_DEPARTMENT = 'Geral'
+
+
+def business_days(periodo_inicio, periodo_fim):
+    """Dias de segunda a sexta entre as duas datas (inclusive)"""
+    start = pd.Timestamp(periodo_inicio).date()
+    end = (pd.Timestamp(periodo_fim) + pd.Timedelta(days=1)).date()
+    return int(np.busday_count(start, end)) if end > start else 0
+
+
+def format_total_hours(minutes):
+    """Formata totais de minutos como "HH:MM" (sem o limite de um dia de format_minutes)"""
+    values = np.atleast_1d(np.asarray(minutes, dtype=np.int64))
+    formatted = np.array([f"{m // 60:02d}:{m % 60:02d}" for m in values], dtype=object)
+    return formatted if np.ndim(minutes) else formatted[0]
+
+
+def summarize_period(df_ponto, periodo_inicio, periodo_fim, schedule=None):
+    """Totais de um funcionário-período a partir da tabela de ponto (uma linha por dia).
+
+    Aceita horários como texto "HH:MM" ou já em minutos. Com ``schedule``
+    (utils.shifts.CompiledSchedule do período), dias úteis, atrasos e horas
+    extras seguem a escala; sem ela, segunda a sexta e a coluna ``Turno``.
+    Horas e dias trabalhados seguem o resumo mensal: dias com ``Horas``
+    diferente de "00:00"; horários inválidos não contam.
+    """
+    horas = df_ponto['Horas']
+    minutos = duration_minutes(horas).astype(np.int64)
+    worked_days = int(worked_days_mask(horas).sum())
+    if schedule is not None:
+        dias_uteis = schedule.work_days
+    else:
+        dias_uteis = business_days(periodo_inicio, periodo_fim)
+
+    totals = {
+        'minutos_trabalhados': int(minutos[minutos != MISSING].sum()),
+        'minutos_extras': 0,
+        'minutos_atraso': 0,
+        'dias_trabalhados': worked_days,
+        'dias_uteis': dias_uteis,
+        'faltas': max(0, dias_uteis - worked_days),
+    }
+    if 'Turno' in df_ponto.columns and len(df_ponto):
+        expected = schedule.expected_for(df_ponto) if schedule is not None else None
+        metrics = punch_metrics(df_ponto, expected)
+        totals['minutos_extras'] = int(metrics['balance'].clip(lower=0).sum())
+        totals['minutos_atraso'] = int((metrics['late_in'] + metrics['late_return']).sum())
+    return totals
+
+
+def period_rollups(records):
+    """Uma linha de totais por funcionário-período de ``records``"""
+    if records.empty:
+        return pd.DataFrame(columns=PERIOD_ROLLUP_COLUMNS)
+    # Como na tela, vale a primeira linha de cada dia
+    days = records.drop_duplicates(PERIOD_KEY + ['Dia'], keep='first')
+    registry = get_shift_registry()
+    rows = []
+    for (matricula, inicio, fim), group in days.groupby(PERIOD_KEY, observed=True, sort=False):
+        departamento = group['departamento'].iloc[-1] if 'departamento' in group.columns else None
+        if not (isinstance(departamento, str) and departamento):
+            departamento = DEFAULT_DEPARTMENT
+        schedule = registry.compile(inicio, fim, matricula, departamento)
+        rows.append({
+            'matricula': str(matricula),
+            'periodo_inicio': inicio,
+            'periodo_fim': fim,
+            'departamento': departamento,
+            'mes': pd.Timestamp(inicio).replace(day=1),
+            **summarize_period(group, inicio, fim, schedule),
+        })
+    return pd.DataFrame(rows, columns=PERIOD_ROLLUP_COLUMNS)
+
+
+def _department_totals(periods):
+    if periods.empty:
+        return pd.DataFrame(columns=DEPARTMENT_KEY + ['funcionarios'] + TOTAL_COLUMNS)
+    totals = periods.assign(funcionarios=1) \
+        .groupby(DEPARTMENT_KEY, as_index=False)[['funcionarios'] + TOTAL_COLUMNS].sum()
+    return totals
+
+
+class RollupStore:
+    """Tabelas de totais por funcionário-período e por departamento-mês"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.periods_path = directory / "periods.csv"
+        self.departments_path = directory / "departments.csv"
+        self._lock = path_lock(self.periods_path)
+
+    def exists(self):
+        return self.periods_path.exists() and self.departments_path.exists()
+
+    def invalidate(self):
+        """Descarta as tabelas; o próximo ``rebuild`` as recria do zero"""
+        with self._lock:
+            self.periods_path.unlink(missing_ok=True)
+            self.departments_path.unlink(missing_ok=True)
+
+    def _read(self, path, date_columns):
+        df = pd.read_csv(path, dtype={'matricula': str, 'departamento': str})
+        for col in date_columns:
+            df[col] = pd.to_datetime(df[col], format='ISO8601')
+        return df
+
+    def _write(self, df, path):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temp_file = path.with_suffix('.tmp')
+        df.to_csv(temp_file, index=False, encoding='utf-8')
+        temp_file.replace(path)
+
+    def load_periods(self):
+        with self._lock:
+            return self._read(self.periods_path, ['periodo_inicio', 'periodo_fim', 'mes'])
+
+    def load_departments(self):
+        """Totais por departamento e mês (a tabela lida pelo painel)"""
+        with self._lock:
+            return self._read(self.departments_path, ['mes'])
+
+    def rebuild(self, load_records):
+        """Recalcula as duas tabelas a partir de todos os registros (``load_records()``)"""
+        with self._lock:
+            periods = period_rollups(load_records())
+            self._write(periods, self.periods_path)
+            self._write(_department_totals(periods), self.departments_path)
+
+    def update(self, keys, load_period):
+        """Atualiza os totais dos funcionários-período de ``keys`` (DataFrame com PERIOD_KEY).
+
+        Os registros de cada período são relidos com ``load_period(matricula,
+        periodo_inicio, periodo_fim)`` sob o lock: uma gravação anterior que
+        chega aqui depois de uma mais nova não sobrescreve os totais dela. Um
+        período sem registros sai das tabelas.
+        """
+        keys = pd.DataFrame({
+            'matricula': keys['matricula'].astype(str),
+            'periodo_inicio': pd.to_datetime(keys['periodo_inicio']),
+            'periodo_fim': pd.to_datetime(keys['periodo_fim']),
+        }).drop_duplicates(ignore_index=True)
+        if keys.empty:
+            return
+        with self._lock:
+            if not self.exists():
+                raise FileNotFoundError("Tabelas de totais ainda não criadas (use rebuild)")
+            records = [load_period(*key) for key in keys.itertuples(index=False)]
+            records = [df for df in records if not df.empty]
+            new = period_rollups(pd.concat(records, ignore_index=True) if records else pd.DataFrame())
+            periods = self.load_periods()
+            departments = self.load_departments()
+
+            replaced = pd.MultiIndex.from_frame(periods[PERIOD_KEY]).isin(pd.MultiIndex.from_frame(keys))
+            old = periods[replaced]
+
+            # Diferença por departamento-mês: soma o novo, subtrai o antigo
+            delta = pd.concat([
+                _department_totals(new),
+                _department_totals(old).assign(
+                    **{col: lambda d, col=col: -d[col] for col in ['funcionarios'] + TOTAL_COLUMNS}
+                ),
+            ]).groupby(DEPARTMENT_KEY, as_index=False).sum()
+            departments = pd.concat([departments, delta]) \
+                .groupby(DEPARTMENT_KEY, as_index=False).sum()
+            departments = departments[departments['funcionarios'] > 0]
+
+            self._write(pd.concat([periods[~replaced], new], ignore_index=True), self.periods_path)
+            self._write(departments, self.departments_path)
@@ -0,0 +1,55 @@
+"""Esquema normalizado dos registros de ponto.
+
+O CSV histórico repete nome, departamento, cargo, salário e período em cada
+linha diária. Aqui os registros são separados em três tabelas:
+
+- ``employees``: uma linha por matrícula (nome, departamento, cargo);
+- ``periods``: uma linha por (matrícula, período), com chave ``periodo_id``
+  e os valores do período (salário bruto, horas extras, salário líquido);
+- ``punches``: as linhas diárias, ligadas ao período por ``periodo_id``.
+
+``denormalize_records`` reconstrói o DataFrame plano usado pela aplicação.
+"""
+import numpy as np
+
+PERIOD_KEY = ['matricula', 'periodo_inicio', 'periodo_fim']
+EMPLOYEE_COLUMNS = ['nome', 'departamento', 'cargo']
+PERIOD_COLUMNS = ['salario_bruto', 'horas_extras', 'salario_liquido']
+
+
+def normalize_records(df):
+    """Separa o DataFrame plano em (employees, periods, punches)"""
+    df = df.copy()
+    df['matricula'] = df['matricula'].astype(str)
+
+    employee_columns = [col for col in EMPLOYEE_COLUMNS if col in df.columns]
+    employees = df[['matricula'] + employee_columns] \
+        .drop_duplicates('matricula', keep='last') \
+        .reset_index(drop=True)
+
+    period_columns = [col for col in PERIOD_COLUMNS if col in df.columns]
+    periods = df[PERIOD_KEY + period_columns] \
+        .drop_duplicates(PERIOD_KEY, keep='last') \
+        .reset_index(drop=True)
+    periods.insert(0, 'periodo_id', np.arange(len(periods), dtype=np.int64))
+
+    punches = df.merge(periods[['periodo_id'] + PERIOD_KEY], on=PERIOD_KEY, how='left')
+    punches = punches.drop(columns=PERIOD_KEY + employee_columns + period_columns)
+    punches.insert(0, 'periodo_id', punches.pop('periodo_id'))
+
+    return employees, periods, punches
+
+
+def denormalize_records(employees, periods, punches):
+    """Visão de compatibilidade: junta as três tabelas no DataFrame plano"""
+    flat = punches.merge(periods, on='periodo_id', how='left') \
+        .merge(employees, on='matricula', how='left')
+
+    punch_columns = [col for col in punches.columns if col != 'periodo_id']
+    employee_columns = [col for col in EMPLOYEE_COLUMNS if col in employees.columns]
+    salary_columns = [col for col in PERIOD_COLUMNS[:1] if col in periods.columns]
+    extra_columns = [col for col in PERIOD_COLUMNS[1:] if col in periods.columns]
+    # Mesma ordem de colunas do employee_records.csv original
+    columns = punch_columns + ['matricula'] + employee_columns + salary_columns \
+        + PERIOD_KEY[1:] + extra_columns
+    return flat[columns]
@@ -0,0 +1,146 @@
+"""Escalas de trabalho carregadas de ``shift_schedules.json``.
+
+O arquivo define:
+
+- ``turnos``: nome -> ``horarios`` (Ent. 1, Saí. 1, Ent. 2, Saí. 2) e
+  ``dias_semana`` (0 = segunda ... 6 = domingo);
+- ``padrao``: turno usado quando nenhuma atribuição se aplica;
+- ``atribuicoes``: lista de ``{"turno", "matricula"?, "departamento"?,
+  "inicio"?, "fim"?}``. Atribuições por matrícula têm prioridade sobre as
+  por departamento, que têm prioridade sobre as gerais; no mesmo nível vale
+  a última da lista;
+- ``feriados``: datas "AAAA-MM-DD" sem expediente para todos.
+
+``ShiftRegistry.compile`` transforma a escala de um funcionário em um
+período em arrays de minutos esperados por dia (compilados uma única vez
+por período), usados pelo motor de ponto no lugar da coluna ``Turno``.
+"""
+import json
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.punch_engine import MISSING, OFF_SHIFT, punch_minutes, shift_minutes
+
+SHIFT_SCHEDULES_FILE = Path(__file__).with_name("shift_schedules.json")
+COMPILED_CACHE_SIZE = 1024
+
+
+class Shift:
+    """Um turno: horários esperados e dias da semana em que vale"""
+
+    def __init__(self, name, config):
+        self.name = name
+        self.label = " ".join(config['horarios'])
+        self.times = punch_minutes(pd.Series(config['horarios'])).tolist()
+        if len(self.times) != 4 or MISSING in self.times:
+            raise ValueError(f"Turno '{name}': informe 4 horários HH:MM válidos")
+        if self.times != sorted(self.times):
+            # As horas trabalhadas são calculadas dentro do mesmo dia
+            raise ValueError(f"Turno '{name}': horários devem ser crescentes (sem virar a meia-noite)")
+        self.weekdays = frozenset(config.get('dias_semana', range(5)))
+
+
+class CompiledSchedule:
+    """Escala de um funcionário em um período: um valor por dia.
+
+    ``expected`` é a matriz (dias, 4) de minutos esperados (MISSING nos dias
+    sem expediente), ``work_day`` os dias com expediente e ``turno`` o texto
+    exibido na coluna ``Turno``.
+    """
+
+    def __init__(self, dates, expected, work_day, turno):
+        self.dates = dates
+        self.day_keys = pd.Index(dates.strftime('%d/%m'))
+        self.expected = expected
+        self.work_day = work_day
+        self.turno = turno
+        for array in (self.expected, self.work_day, self.turno):
+            # Compartilhados entre sessões pelo cache: somente leitura
+            array.setflags(write=False)
+
+    @property
+    def work_days(self):
+        return int(self.work_day.sum())
+
+    def positions(self, dias):
+        """Posição de cada ``Dia`` ("DD/MM ...") no período; -1 quando fora dele"""
+        return self.day_keys.get_indexer(pd.Series(dias).astype(str).str[:5])
+
+    def expected_for(self, df):
+        """Matriz de minutos esperados alinhada às linhas de ``df`` pelo ``Dia``.
+
+        Linhas de dias fora do período usam o ``Turno`` gravado na própria linha.
+        """
+        positions = self.positions(df['Dia'])
+        expected = self.expected[positions]
+        outside = positions < 0
+        if outside.any():
+            expected = expected.copy()
+            expected[outside] = shift_minutes(df['Turno'][outside])
+        return expected
+
+
+class ShiftRegistry:
+    """Turnos, atribuições e feriados; compila escalas por período"""
+
+    def __init__(self, config):
+        self.shifts = {name: Shift(name, shift) for name, shift in config['turnos'].items()}
+        self.default = self.shifts[config['padrao']]
+        self.holidays = pd.DatetimeIndex(pd.to_datetime(config.get('feriados', [])))
+        # Regras gerais primeiro, por matrícula por último: a última regra aplicada vence
+        rules = config.get('atribuicoes', [])
+        self.rules = sorted(rules, key=lambda rule: 2 if rule.get('matricula') else
+                            1 if rule.get('departamento') else 0)
+        for rule in self.rules:
+            if rule['turno'] not in self.shifts:
+                raise ValueError(f"Turno desconhecido na atribuição: {rule['turno']}")
+        self._compile = lru_cache(maxsize=COMPILED_CACHE_SIZE)(self._compile_schedule)
+
+    def _matches(self, rule, matricula, departamento):
+        if rule.get('matricula') and str(rule['matricula']) != matricula:
+            return False
+        if rule.get('departamento') and rule['departamento'] != departamento:
+            return False
+        return True
+
+    def compile(self, periodo_inicio, periodo_fim, matricula=None, departamento=None):
+        """Escala compilada do período (em cache por período, matrícula e departamento)"""
+        return self._compile(
+            pd.Timestamp(periodo_inicio).normalize(), pd.Timestamp(periodo_fim).normalize(),
+            None if matricula is None else str(matricula),
+            departamento if isinstance(departamento, str) else None
+        )
+
+    def _compile_schedule(self, periodo_inicio, periodo_fim, matricula, departamento):
+        dates = pd.date_range(start=periodo_inicio, end=periodo_fim)
+        names = ['__padrao__', *self.shifts]
+        shift_index = np.zeros(len(dates), dtype=np.int64)
+        for rule in self.rules:
+            if not self._matches(rule, matricula, departamento):
+                continue
+            mask = np.ones(len(dates), dtype=bool)
+            if rule.get('inicio'):
+                mask &= dates >= pd.Timestamp(rule['inicio'])
+            if rule.get('fim'):
+                mask &= dates <= pd.Timestamp(rule['fim'])
+            shift_index[mask] = names.index(rule['turno'])
+
+        shifts = [self.default, *self.shifts.values()]
+        times = np.array([shift.times for shift in shifts], dtype=np.int32)
+        weekdays = np.array([[day in shift.weekdays for day in range(7)] for shift in shifts])
+        labels = np.array([shift.label for shift in shifts], dtype=object)
+
+        work_day = weekdays[shift_index, dates.weekday] & ~np.asarray(dates.isin(self.holidays))
+        expected = np.where(work_day[:, None], times[shift_index], MISSING)
+        turno = np.where(work_day, labels[shift_index], OFF_SHIFT).astype(object)
+        return CompiledSchedule(dates, expected, work_day, turno)
+
+
+@lru_cache(maxsize=1)
+def get_shift_registry():
+    """Registro de escalas carregado de SHIFT_SCHEDULES_FILE (uma vez por processo)"""
+    with open(SHIFT_SCHEDULES_FILE, encoding='utf-8') as f:
+        return ShiftRegistry(json.load(f))
@@ -0,0 +1,938 @@
+"""Camada de armazenamento dos registros de ponto.
+
+Os registros são sempre entregues à aplicação como o DataFrame "plano" de
+``employee_records.csv`` (uma linha por dia, com os dados do funcionário
+repetidos). O formato em disco depende do backend escolhido pela variável
+de ambiente ``PONTO_STORAGE_BACKEND``:
+
+- ``csv`` (padrão): o arquivo texto original;
+- ``parquet``: colunas tipadas, horários como minutos inteiros (int16) e
+  matrícula/nome/departamento categóricos. Requer ``pyarrow``;
+- ``normalized`` / ``normalized-parquet``: tabelas separadas de funcionários,
+  períodos e marcações (ver utils.schema), em CSV ou Parquet;
+- ``sqlite``: as mesmas tabelas em um banco SQLite (modo WAL) com índice
+  composto em (matricula, periodo_inicio, periodo_fim).
+
+Para converter os dados existentes, execute uma vez::
+
+    python -m utils.storage migrate parquet
+"""
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+import pandas as pd
+
+from utils.punch_engine import (
+    EMPTY_TIME, MISSING, PUNCH_COLUMNS, duration_minutes, format_minutes, is_minutes, punch_minutes
+)
+from utils.schema import (
+    EMPLOYEE_COLUMNS, PERIOD_COLUMNS, PERIOD_KEY, denormalize_records, normalize_records
+)
+
+DATE_COLUMNS = ['periodo_inicio', 'periodo_fim']
+CATEGORICAL_COLUMNS = ['matricula', 'nome', 'departamento']
+RECORDS_BASENAME = "employee_records"
+RECORD_KEY = ['matricula', 'periodo_inicio', 'periodo_fim', 'Dia']
+OPTIONAL_COLUMNS = ['horas_extras', 'salario_liquido']
+RECORD_COLUMNS = ['Dia', 'Turno'] + PUNCH_COLUMNS + ['Horas', 'Observações', 'matricula', 'nome',
+                  'departamento', 'cargo', 'salario_bruto'] + DATE_COLUMNS + OPTIONAL_COLUMNS
+
+# Linhas por leitura parcial do CSV (load_periods lê o arquivo em blocos)
+READ_CHUNK_ROWS = 50_000
+# Matrículas por consulta "IN (...)" no SQLite
+SQL_MAX_PARAMS = 500
+
+# Tamanho do diário de alterações a partir do qual a compactação é feita
+JOURNAL_COMPACTION_BYTES = 1024 * 1024
+COMPACTION_INTERVAL = 300  # segundos
+
+LOCK_RETRY_INTERVAL = 0.05  # segundos (msvcrt não bloqueia indefinidamente)
+
+_path_locks = {}
+_path_locks_guard = threading.Lock()
+
+
+def _lock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            return
+        except OSError:
+            time.sleep(LOCK_RETRY_INTERVAL)
+
+
+def _unlock_file(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """Lock exclusivo de um arquivo de dados, entre threads e entre processos.
+
+    As threads do processo disputam um RLock; quem o obtém pela primeira vez
+    (sem reentrância) também trava ``<arquivo>.lock`` com um lock consultivo
+    (``fcntl.flock``, ou ``msvcrt.locking`` no Windows), que exclui as
+    outras sessões do Streamlit, o compactador e scripts em outros processos.
+    """
+
+    def __init__(self, path):
+        self.lock_path = Path(f"{path}.lock")
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        try:
+            if self._depth == 0:
+                self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+                f = open(self.lock_path, 'a+b')
+                try:
+                    _lock_file(f)
+                except BaseException:
+                    f.close()
+                    raise
+                self._file = f
+            self._depth += 1
+        except BaseException:
+            self._thread_lock.release()
+            raise
+        return True
+
+    def release(self):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                try:
+                    _unlock_file(self._file)
+                finally:
+                    self._file.close()
+                    self._file = None
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def path_lock(path):
+    """Um FileLock por arquivo, compartilhado por todas as instâncias do processo.
+
+    Usado também pelos outros armazenamentos do diretório de dados (backups,
+    totais do painel) para serializar as próprias gravações.
+    """
+    key = Path(path).resolve()
+    with _path_locks_guard:
+        lock = _path_locks.get(key)
+        if lock is None:
+            lock = _path_locks[key] = FileLock(key)
+        return lock
+
+
+def _format_column(minutes, missing):
+    minutes = np.asarray(minutes)
+    absent = minutes == MISSING
+    formatted = format_minutes(np.where(absent, 0, minutes))
+    formatted[absent] = missing
+    return formatted
+
+
+def prepare_records(df):
+    """Normaliza os tipos das colunas-chave de um DataFrame vindo da aplicação"""
+    df = df.copy()
+    df['matricula'] = df['matricula'].astype(str)
+    return parse_record_dates(df)
+
+
+def _comparable(series):
+    return series.astype(object).fillna('').astype(str)
+
+
+def apply_changes(base, changes):
+    """Substitui em ``base`` as linhas cujas chaves aparecem em ``changes`` (a última vence)"""
+    if changes.empty:
+        return base
+    changes = changes.drop_duplicates(RECORD_KEY, keep='last')
+    if base.empty:
+        return changes.reset_index(drop=True)
+    replaced = pd.MultiIndex.from_frame(base[RECORD_KEY]).isin(pd.MultiIndex.from_frame(changes[RECORD_KEY]))
+    merged = pd.concat([base[~replaced], changes], ignore_index=True)
+    empty = [col for col in OPTIONAL_COLUMNS if col in merged.columns and merged[col].isna().all()]
+    return merged.drop(columns=empty)
+
+
+def _compare(df, reference):
+    """(linha existe em ``reference``, {coluna: valor diferente}) para cada linha de ``df``"""
+    merged = df.merge(reference, on=RECORD_KEY, how='left', suffixes=('', '__ref'), indicator=True)
+    present = (merged['_merge'] == 'both').to_numpy()
+    different = {}
+    for col in df.columns:
+        if col in RECORD_KEY:
+            continue
+        if col not in reference.columns:
+            different[col] = df[col].notna().to_numpy()
+        else:
+            different[col] = (_comparable(merged[col]) != _comparable(merged[f"{col}__ref"])).to_numpy()
+    return merged, present, different
+
+
+def differs(df, reference):
+    """Máscara das linhas de ``df`` ausentes de ``reference`` ou com algum valor diferente"""
+    _, present, different = _compare(df, reference)
+    changed = ~present
+    for mask in different.values():
+        changed |= mask
+    return changed
+
+
+def merge_edits(df, loaded, current):
+    """Aplica a ``current`` só as células de ``df`` que diferem de ``loaded`` (merge em três vias).
+
+    Linhas que não estavam em ``loaded`` ou que ainda não estão em ``current``
+    vêm inteiras de ``df``. Espera uma linha por chave em ``loaded`` e ``current``.
+    """
+    loaded = loaded.drop_duplicates(RECORD_KEY, keep='first')
+    _, was_loaded, edited = _compare(df, loaded)
+    merged, stored, _ = _compare(df, current)
+    result = df.reset_index(drop=True)
+    for col, mask in edited.items():
+        if col not in current.columns:
+            continue
+        keep_current = stored & was_loaded & ~mask
+        if keep_current.any():
+            result[col] = result[col].astype(object)
+            result.loc[keep_current, col] = merged.loc[keep_current, f"{col}__ref"].astype(object).to_numpy()
+    return result
+
+
+def filter_period(df, periodo_inicio, periodo_fim):
+    """Linhas de ``df`` do período [periodo_inicio, periodo_fim]"""
+    if df.empty:
+        return df
+    mask = (df['periodo_inicio'].dt.normalize() == pd.Timestamp(periodo_inicio).normalize()) & \
+           (df['periodo_fim'].dt.normalize() == pd.Timestamp(periodo_fim).normalize())
+    return df[mask]
+
+
+def select_periods(df, keys):
+    """Linhas de ``df`` dos funcionários-período em ``keys`` (DataFrame com PERIOD_KEY)"""
+    if df.empty or keys.empty:
+        return df.iloc[:0]
+    keys = prepare_records(keys[PERIOD_KEY])
+    wanted = pd.MultiIndex.from_frame(keys)
+    current = pd.MultiIndex.from_frame(prepare_records(df[PERIOD_KEY]))
+    return df[current.isin(wanted)]
+
+
+def latest_employees(frames):
+    """Junta leituras de cadastro (a mais nova por último): uma linha por matrícula, a última"""
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=['matricula', *EMPLOYEE_COLUMNS, 'salario_bruto'])
+    df = pd.concat(frames, ignore_index=True)
+    df['matricula'] = df['matricula'].astype(str)
+    return df.drop_duplicates('matricula', keep='last').reset_index(drop=True)
+
+
+def parse_record_dates(df):
+    """Converte as colunas de período para datetime (o CSV histórico mistura formatos)"""
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format='ISO8601')
+    return df
+
+
+def encode_records(df):
+    """Converte o DataFrame plano para a representação tipada (em disco e no RecordCache).
+
+    Colunas já convertidas são mantidas. Marcações válidas são gravadas como minutos do dia e voltam normalizadas
+    ("7:17" -> "07:17"); textos que não são horários viram "--:--". Por isso o ``upsert`` recusa
+    marcações inválidas (ver invalid_punches): só registros antigos ainda podem tê-las.
+    """
+    encoded = df.copy()
+    for col in PUNCH_COLUMNS:
+        if col in encoded.columns:
+            encoded[col] = punch_minutes(encoded[col]).astype(np.int16)
+    if 'Horas' in encoded.columns:
+        encoded['Horas'] = duration_minutes(encoded['Horas'])
+    if 'matricula' in encoded.columns:
+        encoded['matricula'] = encoded['matricula'].astype(str)
+    for col in CATEGORICAL_COLUMNS:
+        if col in encoded.columns:
+            encoded[col] = encoded[col].astype('category')
+    return parse_record_dates(encoded)
+
+
+def invalid_punches(df):
+    """Marcações preenchidas que não são horários "HH:MM": ``[(Dia, coluna, valor)]``"""
+    invalid = []
+    for col in PUNCH_COLUMNS:
+        if col not in df.columns or is_minutes(df[col]):
+            continue
+        values = df[col]
+        filled = (values.notna() & ~values.astype(str).str.strip().isin(['', EMPTY_TIME])).to_numpy()
+        bad = filled & (punch_minutes(values) == MISSING)
+        invalid += [(dia, col, value) for dia, value in zip(df['Dia'][bad], values[bad])]
+    return invalid
+
+
+def check_punches(df):
+    """ValueError quando ``df`` tem marcações inválidas (elas se perderiam no cache e nos backups)"""
+    invalid = invalid_punches(df)
+    if invalid:
+        listed = ", ".join(f"{dia} {col}: '{value}'" for dia, col, value in invalid[:10])
+        more = f" (e mais {len(invalid) - 10})" if len(invalid) > 10 else ""
+        raise ValueError(f"Marcações inválidas (use HH:MM): {listed}{more}")
+
+
+def decode_records(df):
+    """Converte a representação tipada de volta para o DataFrame plano da aplicação.
+
+    Colunas que já estão como texto são mantidas.
+    """
+    for col in PUNCH_COLUMNS:
+        if col in df.columns and is_minutes(df[col]):
+            df[col] = _format_column(df[col], "--:--")
+    if 'Horas' in df.columns and is_minutes(df['Horas']):
+        df['Horas'] = _format_column(df['Horas'], "00:00")
+    return df
+
+
+class RecordStore:
+    """Interface comum dos backends de armazenamento de registros.
+
+    Os backends em arquivo gravam alterações incrementais em um diário
+    (``<arquivo>.journal``, CSV só de acréscimo) e o incorporam ao arquivo
+    principal na compactação, feita periodicamente em segundo plano.
+    """
+
+    suffix = None
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.journal_path = self.path.with_name(f"{self.path.name}.journal")
+        self._lock = path_lock(self.path)
+
+    def _base_exists(self):
+        return self.path.exists()
+
+    def exists(self):
+        return self._base_exists() or self.journal_path.exists()
+
+    def _read(self, matricula=None):
+        raise NotImplementedError
+
+    def _write(self, df, path):
+        raise NotImplementedError
+
+    def _read_where(self, column, values):
+        """Só as linhas com ``column`` em ``values``, sem carregar o arquivo inteiro"""
+        raise NotImplementedError
+
+    def _read_periods(self, keys):
+        """Só as linhas dos funcionários-período em ``keys``"""
+        return select_periods(self._read_where('matricula', keys['matricula'].astype(str).unique()), keys)
+
+    def _read_columns(self, columns):
+        """Só as colunas ``columns`` (as que existirem) de todas as linhas"""
+        raise NotImplementedError
+
+    def _data_files(self):
+        return [self.path, self.journal_path]
+
+    def signature(self):
+        """(mtime, tamanho) dos arquivos de dados; muda a cada gravação"""
+        signature = []
+        for path in self._data_files():
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def load(self, matricula=None):
+        """Carrega os registros (opcionalmente só os de uma matrícula)"""
+        with self._lock:
+            df = self._read(matricula) if self._base_exists() else pd.DataFrame()
+            if self.journal_path.exists():
+                df = apply_changes(df, CsvRecordStore(self.journal_path)._read(matricula))
+            return df
+
+    def load_period(self, matricula, periodo_inicio, periodo_fim):
+        """Carrega os registros de uma matrícula em um período específico"""
+        return filter_period(self.load(matricula=matricula), periodo_inicio, periodo_fim)
+
+    def load_periods(self, keys):
+        """Carrega os registros dos funcionários-período em ``keys`` (DataFrame com PERIOD_KEY).
+
+        A memória usada depende das linhas selecionadas, não do total de registros.
+        """
+        with self._lock:
+            df = self._read_periods(keys) if self._base_exists() else pd.DataFrame()
+            if self.journal_path.exists():
+                df = apply_changes(df, CsvRecordStore(self.journal_path)._read_periods(keys))
+            return df
+
+    def employees(self):
+        """Cadastro mais recente de cada matrícula (nome, departamento, cargo e salário).
+
+        Lê só essas colunas; no diário, as linhas mais novas vencem.
+        """
+        columns = ['matricula', *EMPLOYEE_COLUMNS, 'salario_bruto']
+        frames = []
+        with self._lock:
+            if self._base_exists():
+                frames.append(self._read_columns(columns))
+            if self.journal_path.exists():
+                frames.append(CsvRecordStore(self.journal_path)._read_columns(columns))
+        return latest_employees(frames)
+
+    def _save_base(self, df):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = self.path.with_suffix('.tmp')
+        self._write(df, temp_file)
+        temp_file.replace(self.path)
+
+    def save(self, df):
+        """Grava todos os registros de forma atômica (arquivo temporário + replace)"""
+        with self._lock:
+            self._save_base(df)
+            self.journal_path.unlink(missing_ok=True)
+
+    def _current_rows(self, df):
+        """Linhas gravadas das matrículas de ``df``, uma por dia (a primeira, como a tela mostra)"""
+        matriculas = df['matricula'].unique()
+        if len(matriculas) == 1:
+            current = self.load(matriculas[0])
+        else:
+            # Lotes com vários funcionários (importação): só os funcionários-período do lote
+            current = self.load_periods(df[PERIOD_KEY].drop_duplicates())
+        if current.empty:
+            return current
+        return current.drop_duplicates(RECORD_KEY, keep='first')
+
+    def changed_rows(self, df, loaded=None):
+        """Retorna só as linhas de ``df`` novas ou diferentes do que já está gravado.
+
+        Com ``loaded`` (as linhas como a sessão as carregou), a comparação é em
+        três vias: só as células que a sessão alterou substituem as gravadas, e
+        o resto da linha vem do que está gravado agora. Assim duas sessões que
+        editam dias diferentes do mesmo funcionário-período não desfazem uma a
+        outra.
+        """
+        df = prepare_records(df)
+        if df.empty or not self.exists():
+            return df
+        current = self._current_rows(df)
+        if current.empty:
+            return df
+        if loaded is not None:
+            df = merge_edits(df, prepare_records(loaded), current)
+        return df[differs(df, current)]
+
+    def upsert(self, df, loaded=None):
+        """Grava apenas as linhas novas ou alteradas, chaveadas por (matrícula, período, Dia).
+
+        ``loaded`` são as linhas como a sessão as carregou (ver changed_rows).
+        Marcações inválidas em ``df`` levantam ValueError (ver check_punches).
+        Retorna a quantidade de linhas gravadas.
+        """
+        check_punches(df)
+        with self._lock:
+            changed = self.changed_rows(df, loaded)
+            if not changed.empty:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                changed.reindex(columns=RECORD_COLUMNS).to_csv(
+                    self.journal_path, mode='a', header=not self.journal_path.exists(),
+                    index=False, encoding='utf-8'
+                )
+            return len(changed)
+
+    def needs_compaction(self):
+        return self.journal_path.exists() and self.journal_path.stat().st_size >= JOURNAL_COMPACTION_BYTES
+
+    def compact(self):
+        """Incorpora o diário de alterações ao arquivo principal"""
+        with self._lock:
+            if not self.journal_path.exists():
+                return False
+            self._save_base(self.load())
+            self.journal_path.unlink()
+            return True
+
+    def copy_to(self, destination):
+        """Copia os registros para ``destination`` (usado pelos backups)"""
+        with self._lock:
+            if self.journal_path.exists():
+                self._write(self.load(), destination)
+            else:
+                shutil.copyfile(self.path, destination)
+
+
+class CsvRecordStore(RecordStore):
+    """Backend texto: o employee_records.csv original"""
+
+    suffix = '.csv'
+
+    def _read(self, matricula=None):
+        df = self._typed(pd.read_csv(self.path, dtype={'matricula': str}))
+        if matricula is not None:
+            df = df[df['matricula'] == str(matricula)]
+        return df
+
+    @staticmethod
+    def _typed(df):
+        df = parse_record_dates(df)
+        for col in PUNCH_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype(str)
+        return df
+
+    def _read_chunks(self, select):
+        """Lê o CSV em blocos de READ_CHUNK_ROWS linhas, guardando só ``select(bloco)``"""
+        with pd.read_csv(self.path, dtype={'matricula': str}, chunksize=READ_CHUNK_ROWS) as reader:
+            chunks = [select(chunk) for chunk in reader]
+        if not chunks:
+            return pd.DataFrame()
+        return self._typed(pd.concat(chunks, ignore_index=True))
+
+    def _read_where(self, column, values):
+        values = pd.Index(values).astype(str)
+        return self._read_chunks(lambda chunk: chunk[chunk[column].astype(str).isin(values)])
+
+    def _read_periods(self, keys):
+        return self._read_chunks(lambda chunk: select_periods(parse_record_dates(chunk), keys))
+
+    def _read_columns(self, columns):
+        return parse_record_dates(pd.read_csv(self.path, usecols=lambda col: col in columns,
+                                              dtype={'matricula': str}))
+
+    def _write(self, df, path):
+        df.to_csv(path, index=False, encoding='utf-8')
+
+
+class ParquetRecordStore(RecordStore):
+    """Backend colunar: Parquet tipado com horários em minutos inteiros"""
+
+    suffix = '.parquet'
+
+    def __init__(self, path):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("O backend 'parquet' requer o pacote pyarrow (pip install pyarrow)") from e
+        super().__init__(path)
+
+    def _read(self, matricula=None):
+        filters = [('matricula', '==', str(matricula))] if matricula is not None else None
+        df = pd.read_parquet(self.path, filters=filters)
+        return decode_records(df)
+
+    def _read_where(self, column, values):
+        return decode_records(pd.read_parquet(self.path, filters=[(column, 'in', list(values))]))
+
+    def _read_periods(self, keys):
+        filters = [('matricula', 'in', list(keys['matricula'].astype(str).unique())),
+                   ('periodo_inicio', 'in', list(pd.to_datetime(keys['periodo_inicio']).unique()))]
+        return select_periods(decode_records(pd.read_parquet(self.path, filters=filters)), keys)
+
+    def _read_columns(self, columns):
+        import pyarrow.parquet as pq
+        present = set(pq.read_schema(self.path).names)
+        return decode_records(pd.read_parquet(self.path, columns=[col for col in columns if col in present]))
+
+    def _write(self, df, path):
+        encode_records(df).to_parquet(path, index=False)
+
+
+class NormalizedRecordStore(RecordStore):
+    """Backend normalizado: tabelas employees, periods e punches em um diretório.
+
+    Cada tabela é gravada com ``table_store`` (CSV ou Parquet); a aplicação
+    continua recebendo o DataFrame plano através de denormalize_records.
+    """
+
+    TABLES = ('employees', 'periods', 'punches')
+
+    def __init__(self, path, table_store=CsvRecordStore):
+        super().__init__(path)
+        self.table_store = table_store
+        self.suffix = table_store.suffix
+
+    def _table(self, name):
+        return self.table_store(self.path / f"{name}{self.suffix}")
+
+    def _base_exists(self):
+        return self._table('punches').exists()
+
+    def _data_files(self):
+        return [self._table(name).path for name in self.TABLES] + [self.journal_path]
+
+    def _read(self, matricula=None):
+        employees = self._table('employees')._read(matricula=matricula)
+        periods = self._table('periods')._read(matricula=matricula)
+        punches = self._table('punches')._read()
+        if matricula is not None:
+            punches = punches[punches['periodo_id'].isin(periods['periodo_id'])]
+        return denormalize_records(employees, periods, punches)
+
+    def _read_periods(self, keys):
+        matriculas = keys['matricula'].astype(str).unique()
+        employees = self._table('employees')._read_where('matricula', matriculas)
+        periods = select_periods(self._table('periods')._read_where('matricula', matriculas), keys)
+        punches = self._table('punches')._read_where('periodo_id', periods['periodo_id'].unique())
+        return denormalize_records(employees, periods, punches)
+
+    def _read_columns(self, columns):
+        # Cadastro em employees e salário em periods: nenhuma das duas tem as linhas diárias
+        employees = self._table('employees')._read()
+        periods = self._table('periods')._read()
+        period_columns = [col for col in columns if col in periods.columns and col not in employees.columns]
+        latest = periods.drop_duplicates('matricula', keep='last')[['matricula', *period_columns]]
+        df = employees.merge(latest, on='matricula', how='left')
+        return df[[col for col in columns if col in df.columns]]
+
+    def _save_base(self, df):
+        for name, table in zip(self.TABLES, normalize_records(df)):
+            self._table(name)._save_base(table)
+
+    def copy_to(self, destination):
+        """Backups continuam sendo arquivos planos no formato das tabelas"""
+        self.table_store(destination)._save_base(self.load())
+
+
+class SqliteRecordStore(RecordStore):
+    """Backend SQLite (somente biblioteca padrão) com as tabelas normalizadas.
+
+    Buscar um funcionário ou um funcionário-período é uma consulta indexada
+    em vez de uma varredura de todos os registros.
+    """
+
+    suffix = '.sqlite3'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS employees (
+            matricula TEXT PRIMARY KEY,
+            nome TEXT,
+            departamento TEXT,
+            cargo TEXT
+        );
+        CREATE TABLE IF NOT EXISTS periods (
+            periodo_id INTEGER PRIMARY KEY,
+            matricula TEXT NOT NULL,
+            periodo_inicio TEXT NOT NULL,
+            periodo_fim TEXT NOT NULL,
+            salario_bruto REAL,
+            horas_extras REAL,
+            salario_liquido REAL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_periods_key
+            ON periods (matricula, periodo_inicio, periodo_fim);
+        CREATE TABLE IF NOT EXISTS punches (
+            periodo_id INTEGER NOT NULL REFERENCES periods (periodo_id),
+            dia TEXT NOT NULL,
+            turno TEXT,
+            ent1 INTEGER,
+            sai1 INTEGER,
+            ent2 INTEGER,
+            sai2 INTEGER,
+            horas INTEGER,
+            observacoes TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_punches_period ON punches (periodo_id, dia);
+    """
+
+    # Nomes das colunas do DataFrame plano -> colunas da tabela punches
+    PUNCH_FIELDS = {
+        'Dia': 'dia', 'Turno': 'turno',
+        'Ent. 1': 'ent1', 'Saí. 1': 'sai1', 'Ent. 2': 'ent2', 'Saí. 2': 'sai2',
+        'Horas': 'horas', 'Observações': 'observacoes',
+    }
+
+    SELECT = """
+        SELECT p.dia, p.turno, p.ent1, p.sai1, p.ent2, p.sai2, p.horas, p.observacoes,
+               per.matricula, e.nome, e.departamento, e.cargo, per.salario_bruto,
+               per.periodo_inicio, per.periodo_fim, per.horas_extras, per.salario_liquido
+        FROM punches p
+        JOIN periods per ON per.periodo_id = p.periodo_id
+        LEFT JOIN employees e ON e.matricula = per.matricula
+    """
+
+    def __init__(self, path):
+        super().__init__(path)
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _initialize(self):
+        """Modo WAL (persistente no arquivo) e tabelas, uma única vez por store"""
+        with self._init_lock:
+            if self._initialized and self.path.exists():
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(self.SCHEMA)
+            self._initialized = True
+
+    @contextmanager
+    def connect(self):
+        """Conexão em uma transação (commit ao sair sem erro), fechada no final"""
+        self._initialize()
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            # synchronous vale por conexão
+            conn.execute("PRAGMA synchronous=NORMAL")
+            with conn:
+                yield conn
+
+    def _query(self, where="", params=()):
+        with self.connect() as conn:
+            df = pd.read_sql_query(f"{self.SELECT} {where} ORDER BY p.rowid", conn, params=params)
+        df = df.rename(columns={v: k for k, v in self.PUNCH_FIELDS.items()})
+        for col in PUNCH_COLUMNS + ['Horas']:
+            df[col] = df[col].fillna(MISSING).astype(np.int16)
+        optional = [col for col in OPTIONAL_COLUMNS if df[col].isna().all()]
+        return parse_record_dates(decode_records(df.drop(columns=optional)))
+
+    def load(self, matricula=None):
+        if matricula is None:
+            return self._query()
+        return self._query("WHERE per.matricula = ?", (str(matricula),))
+
+    def load_period(self, matricula, periodo_inicio, periodo_fim):
+        return self._query(
+            "WHERE per.matricula = ? AND per.periodo_inicio = ? AND per.periodo_fim = ?",
+            (str(matricula), _sql_date(periodo_inicio), _sql_date(periodo_fim))
+        )
+
+    def load_periods(self, keys):
+        # Uma consulta indexada por período e bloco de matrículas
+        frames = []
+        for (inicio, fim), group in prepare_records(keys).groupby(['periodo_inicio', 'periodo_fim']):
+            matriculas = list(group['matricula'].unique())
+            for i in range(0, len(matriculas), SQL_MAX_PARAMS):
+                chunk = matriculas[i:i + SQL_MAX_PARAMS]
+                frames.append(self._query(
+                    f"WHERE per.periodo_inicio = ? AND per.periodo_fim = ? "
+                    f"AND per.matricula IN ({', '.join('?' * len(chunk))})",
+                    (_sql_date(inicio), _sql_date(fim), *chunk)
+                ))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def employees(self):
+        # Salário do período com a linha diária mais recente, como na ordem de load()
+        with self.connect() as conn:
+            df = pd.read_sql_query("""
+                SELECT per.matricula, e.nome, e.departamento, e.cargo, per.salario_bruto
+                FROM periods per
+                LEFT JOIN employees e ON e.matricula = per.matricula
+                ORDER BY (SELECT MAX(p.rowid) FROM punches p WHERE p.periodo_id = per.periodo_id)
+            """, conn)
+        return latest_employees([df])
+
+    def exists(self):
+        return self.path.exists()
+
+    def _data_files(self):
+        return [self.path, self.path.with_name(f"{self.path.name}-wal")]
+
+    def _normalized(self, df):
+        employees, periods, punches = normalize_records(df)
+        employees = employees.reindex(columns=['matricula'] + EMPLOYEE_COLUMNS)
+        periods = periods.reindex(columns=['periodo_id'] + PERIOD_KEY + PERIOD_COLUMNS)
+        for col in DATE_COLUMNS:
+            periods[col] = pd.to_datetime(periods[col], format='ISO8601').dt.strftime('%Y-%m-%d')
+        punches = encode_records(punches).rename(columns=self.PUNCH_FIELDS)
+        time_fields = [self.PUNCH_FIELDS[col] for col in PUNCH_COLUMNS + ['Horas']]
+        punches[time_fields] = punches[time_fields].astype(object).where(punches[time_fields] != MISSING, None)
+        punches = punches[['periodo_id'] + list(self.PUNCH_FIELDS.values())]
+        return employees, periods, punches
+
+    def save(self, df):
+        employees, periods, punches = self._normalized(df)
+        with self._lock:
+            with self.connect() as conn:
+                conn.execute("DELETE FROM punches")
+                conn.execute("DELETE FROM periods")
+                conn.execute("DELETE FROM employees")
+                employees.to_sql('employees', conn, if_exists='append', index=False)
+                periods.to_sql('periods', conn, if_exists='append', index=False)
+                punches.to_sql('punches', conn, if_exists='append', index=False)
+
+    def upsert(self, df, loaded=None):
+        """Grava só as linhas alteradas com INSERT ... ON CONFLICT / UPDATE indexados"""
+        check_punches(df)
+        # O lock evita que outro processo grave entre a comparação e a escrita
+        with self._lock:
+            changed = self.changed_rows(df, loaded)
+            if changed.empty:
+                return 0
+
+            employees, periods, punches = self._normalized(changed)
+            punch_fields = list(self.PUNCH_FIELDS.values())[1:]
+            with self.connect() as conn:
+                conn.executemany("""
+                    INSERT INTO employees (matricula, nome, departamento, cargo) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (matricula) DO UPDATE SET
+                        nome = excluded.nome, departamento = excluded.departamento, cargo = excluded.cargo
+                """, _sql_rows(employees))
+
+                period_ids = {}
+                for row in _sql_rows(periods):
+                    local_id, key = row[0], row[1:4]
+                    conn.execute("""
+                        INSERT INTO periods (matricula, periodo_inicio, periodo_fim,
+                                             salario_bruto, horas_extras, salario_liquido)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (matricula, periodo_inicio, periodo_fim) DO UPDATE SET
+                            salario_bruto = excluded.salario_bruto,
+                            horas_extras = COALESCE(excluded.horas_extras, periods.horas_extras),
+                            salario_liquido = COALESCE(excluded.salario_liquido, periods.salario_liquido)
+                    """, row[1:])
+                    period_ids[local_id] = conn.execute(
+                        "SELECT periodo_id FROM periods WHERE matricula = ? AND periodo_inicio = ? AND periodo_fim = ?",
+                        key
+                    ).fetchone()[0]
+
+                assignments = ", ".join(f"{field} = ?" for field in punch_fields)
+                for row in _sql_rows(punches):
+                    periodo_id, dia, values = period_ids[row[0]], row[1], row[2:]
+                    updated = conn.execute(
+                        f"UPDATE punches SET {assignments} WHERE periodo_id = ? AND dia = ?",
+                        (*values, periodo_id, dia)
+                    ).rowcount
+                    if not updated:
+                        conn.execute(
+                            f"INSERT INTO punches (periodo_id, dia, {', '.join(punch_fields)}) "
+                            f"VALUES ({', '.join('?' * (len(punch_fields) + 2))})",
+                            (periodo_id, dia, *values)
+                        )
+            return len(changed)
+
+    def needs_compaction(self):
+        wal = self.path.with_name(f"{self.path.name}-wal")
+        return wal.exists() and wal.stat().st_size >= JOURNAL_COMPACTION_BYTES
+
+    def compact(self):
+        """No SQLite a compactação é um checkpoint do arquivo WAL"""
+        with self.connect() as conn:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return True
+
+    def copy_to(self, destination):
+        """Usa a API de backup do SQLite (segura com o arquivo WAL)"""
+        with self.connect() as source, closing(sqlite3.connect(destination)) as target:
+            source.backup(target)
+
+
+def _sql_date(value):
+    return pd.Timestamp(value).strftime('%Y-%m-%d')
+
+
+def _sql_rows(df):
+    """Linhas de ``df`` como tuplas com None no lugar de NaN"""
+    return list(df.astype(object).where(df.notna(), None).itertuples(index=False, name=None))
+
+
+class Compactor(threading.Thread):
+    """Compacta periodicamente, em segundo plano, o diário de alterações de um store"""
+
+    def __init__(self, store, interval=COMPACTION_INTERVAL):
+        super().__init__(name=f"compactor-{store.path.name}", daemon=True)
+        self.store = store
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                if self.store.needs_compaction():
+                    self.store.compact()
+            except Exception:
+                logging.exception("Falha ao compactar %s", self.store.path)
+
+    def stop(self):
+        self._stopped.set()
+
+
+_compactors = {}
+
+
+def start_compactor(store, interval=COMPACTION_INTERVAL):
+    """Inicia (uma única vez por arquivo) a compactação periódica do store"""
+    key = store.path.resolve()
+    with _path_locks_guard:
+        compactor = _compactors.get(key)
+        if compactor is None or not compactor.is_alive():
+            compactor = _compactors[key] = Compactor(store, interval)
+            compactor.start()
+        return compactor
+
+
+BACKENDS = {
+    'csv': lambda data_dir: CsvRecordStore(data_dir / f"{RECORDS_BASENAME}.csv"),
+    'parquet': lambda data_dir: ParquetRecordStore(data_dir / f"{RECORDS_BASENAME}.parquet"),
+    'normalized': lambda data_dir: NormalizedRecordStore(data_dir / RECORDS_BASENAME),
+    'normalized-parquet': lambda data_dir: NormalizedRecordStore(
+        data_dir / RECORDS_BASENAME, ParquetRecordStore
+    ),
+    'sqlite': lambda data_dir: SqliteRecordStore(data_dir / f"{RECORDS_BASENAME}.sqlite3"),
+}
+
+
+def get_record_store(data_dir, backend=None):
+    """Retorna o backend configurado (argumento ou PONTO_STORAGE_BACKEND)"""
+    backend = (backend or os.getenv('PONTO_STORAGE_BACKEND', 'csv')).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend de armazenamento desconhecido: {backend}")
+    return BACKENDS[backend](Path(data_dir))
+
+
+def migrate_records(data_dir, backend):
+    """Converte employee_records.csv para o backend indicado.
+
+    O CSV original é mantido. Os backups não são convertidos: eles ficam no
+    catálogo de utils.backups, em qualquer backend (os antigos ``backup_*.csv``
+    entram com ``python -m utils.backups import-legacy``). Retorna a lista de
+    destinos gerados.
+    """
+    data_dir = Path(data_dir)
+    source = CsvRecordStore(data_dir / f"{RECORDS_BASENAME}.csv")
+    target = get_record_store(data_dir, backend)
+
+    migrated = []
+    if source.exists() and target.path != source.path:
+        target.save(source.load())
+        migrated.append(target.path)
+    return migrated
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != 'migrate':
+        sys.exit("Uso: python -m utils.storage migrate <backend> [diretório de dados]")
+    for path in migrate_records(sys.argv[3] if len(sys.argv) > 3 else 'data', sys.argv[2]):
+        print(f"Migrado: {path}")
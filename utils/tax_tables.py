@@ -0,0 +1,93 @@
+"""Tabelas de INSS e IRRF carregadas de ``tax_tables.json``, por ano.
+
+Cada ano é compilado uma única vez em arrays de limites, alíquotas e
+parcelas acumuladas, de modo que cada consulta é um único ``bisect``
+(valor escalar) ou ``np.searchsorted`` (lote). As faixas são fechadas à
+direita ("até"), sem buracos entre elas: 1320.005 cai na segunda faixa.
+
+Para um novo ano basta acrescentar a entrada correspondente no JSON.
+"""
+import json
+from bisect import bisect_left
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+TAX_TABLES_FILE = Path(__file__).with_name("tax_tables.json")
+
+
+class TaxTable:
+    """Tabela de um ano, pré-compilada para consulta por bisect/searchsorted"""
+
+    def __init__(self, year, config):
+        self.year = year
+
+        # INSS progressivo: valor = (salário - limite inferior) * alíquota + parcelas
+        # acumuladas das faixas anteriores (arredondadas em centavos, como na tabela oficial)
+        inss = config['inss']['faixas']
+        self.inss_limits = [faixa['ate'] for faixa in inss]
+        self.inss_rates = [faixa['aliquota'] for faixa in inss]
+        self.inss_lower = [0.0] + self.inss_limits[:-1]
+        self.inss_accumulated = [0.0]
+        for lower, upper, rate in zip(self.inss_lower, self.inss_limits, self.inss_rates):
+            self.inss_accumulated.append(round(self.inss_accumulated[-1] + (upper - lower) * rate, 2))
+        # Acima da última faixa a contribuição fica no teto
+        self.inss_ceiling = self.inss_accumulated.pop()
+
+        irrf = config['irrf']
+        self.deducao_dependente = irrf['deducao_dependente']
+        self.irrf_limits = [faixa['ate'] for faixa in irrf['faixas'] if faixa['ate'] is not None]
+        self.irrf_rates = [faixa['aliquota'] for faixa in irrf['faixas']]
+        self.irrf_deductions = [faixa['deducao'] for faixa in irrf['faixas']]
+
+        self._arrays = {
+            name: np.array(getattr(self, name), dtype=float)
+            for name in ('inss_limits', 'inss_rates', 'inss_lower', 'inss_accumulated',
+                         'irrf_limits', 'irrf_rates', 'irrf_deductions')
+        }
+
+    def inss(self, salario):
+        i = bisect_left(self.inss_limits, salario)
+        if i == len(self.inss_limits):
+            return self.inss_ceiling
+        return (salario - self.inss_lower[i]) * self.inss_rates[i] + self.inss_accumulated[i]
+
+    def irrf(self, base):
+        i = bisect_left(self.irrf_limits, base)
+        return max(0, base * self.irrf_rates[i] - self.irrf_deductions[i])
+
+    def inss_batch(self, salario):
+        a = self._arrays
+        salario = np.asarray(salario, dtype=float)
+        i = np.searchsorted(a['inss_limits'], salario, side='left')
+        top = i == len(a['inss_limits'])
+        i = np.minimum(i, len(a['inss_limits']) - 1)
+        value = (salario - a['inss_lower'][i]) * a['inss_rates'][i] + a['inss_accumulated'][i]
+        return np.where(top, self.inss_ceiling, value)
+
+    def irrf_batch(self, base):
+        a = self._arrays
+        base = np.asarray(base, dtype=float)
+        i = np.searchsorted(a['irrf_limits'], base, side='left')
+        return np.maximum(0, base * a['irrf_rates'][i] - a['irrf_deductions'][i])
+
+
+@lru_cache(maxsize=1)
+def _load_config():
+    with open(TAX_TABLES_FILE, encoding='utf-8') as f:
+        return {int(year): config for year, config in json.load(f).items()}
+
+
+@lru_cache(maxsize=None)
+def _compiled(year):
+    return TaxTable(year, _load_config()[year])
+
+
+def get_tax_table(year=None):
+    """Tabela vigente no ano (a mais recente até ``year``; sem ano, a mais recente)"""
+    years = sorted(_load_config())
+    if year is None:
+        return _compiled(years[-1])
+    i = bisect_left(years, int(year) + 1)
+    return _compiled(years[max(i - 1, 0)])
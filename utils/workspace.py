@@ -0,0 +1,101 @@
+"""Armazenamentos de um diretório de dados, sem dependência do Streamlit.
+
+``Workspace`` reúne o RecordStore, o cache de registros, os backups, o
+cache de relatórios PDF e as tabelas de totais de um diretório de dados, e
+concentra o que precisa acontecer depois de uma gravação (invalidar caches
+e atualizar os totais do painel). É usado pela aplicação (uma instância por
+processo do servidor) e pela linha de comando de utils.cli.
+
+Criar um Workspace não cria diretórios nem inicia threads: os diretórios
+são criados na primeira gravação e a compactação em segundo plano é
+iniciada por quem precisa dela (start_compactor).
+"""
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from utils.backups import BackupStore
+from utils.record_cache import RecordCache
+from utils.report_cache import ReportCache
+from utils.rollups import RollupStore
+from utils.storage import decode_records, encode_records, get_record_store
+
+DATA_DIR = Path("data")
+
+
+class Workspace:
+    """Registros, backups, relatórios em cache e totais de um diretório de dados"""
+
+    def __init__(self, data_dir=DATA_DIR, backend=None):
+        self.data_dir = Path(data_dir)
+        self.records = get_record_store(self.data_dir, backend)
+        self.cache = RecordCache(self.records)
+        self.backups = BackupStore(self.data_dir / "backups")
+        self.report_cache = ReportCache(self.data_dir / "report_cache")
+        self.rollups = RollupStore(self.data_dir / "rollups")
+
+    def records_changed(self, periods):
+        """Depois de gravar os funcionários-período de ``periods`` (qualquer DataFrame com PERIOD_KEY).
+
+        Invalida o cache de registros e os relatórios em cache, registra os
+        períodos para o próximo backup incremental e atualiza os totais do
+        painel. Se a atualização dos totais falhar, as tabelas são descartadas
+        (serão recalculadas) e a exceção é propagada.
+        """
+        self.cache.bump()
+        self.backups.mark_changed(periods)
+        for matricula in periods['matricula'].astype(str).unique():
+            self.report_cache.invalidate(matricula)
+        self.update_rollups(periods)
+
+    def update_rollups(self, periods):
+        try:
+            if not self.rollups.exists():
+                self.rollups.rebuild(partial(self.cache.load, encoded=True))
+                return
+            # Relidos pelo RollupStore sob o lock das tabelas (ver RollupStore.update)
+            self.rollups.update(periods, partial(self.cache.load_period, encoded=True))
+        except Exception:
+            self.rollups.invalidate()
+            raise
+
+    def load_rollups(self):
+        """Totais por departamento e mês, recalculados se ainda não existirem"""
+        if not self.rollups.exists():
+            self.rollups.rebuild(partial(self.cache.load, encoded=True))
+        return self.rollups.load_departments()
+
+    def create_backup(self, full=False):
+        """Snapshot dos registros atuais, ou None quando ainda não há registros.
+
+        Normalmente só os funcionários-período gravados desde o último snapshot
+        são lidos (ver BackupStore.create_incremental); ``full`` relê tudo.
+        """
+        if not self.records.exists():
+            return None
+        # Lida antes dos registros: o que for gravado depois fica para o próximo snapshot
+        pending = self.backups.pending_changes()
+        if full or pending.full or not self.backups.snapshots(limit=1):
+            return self.backups.create(self.cache.load(), pending=pending)
+        records = self.records.load_periods(pending.keys) if len(pending.keys) else pd.DataFrame()
+        # Normalizados como no cache, para gerar os mesmos blocos de um snapshot completo
+        return self.backups.create_incremental(pending, decode_records(encode_records(records)))
+
+    def restore(self, snapshot_id):
+        """Restaura todos os registros a partir de um snapshot"""
+        restored = self.backups.restore(snapshot_id, self.records)
+        self.cache.bump()
+        self.backups.mark_all_changed()
+        for matricula in restored['matricula'].astype(str).unique():
+            self.report_cache.invalidate(matricula)
+        # Tudo pode ter mudado: os totais são recalculados na próxima leitura
+        self.rollups.invalidate()
+        return restored
+
+    def restore_period(self, snapshot_id, matricula, periodo_inicio, periodo_fim):
+        """Restaura um único funcionário-período a partir de um snapshot"""
+        self.backups.restore_period(snapshot_id, self.records, matricula, periodo_inicio, periodo_fim)
+        self.records_changed(pd.DataFrame([{
+            'matricula': str(matricula), 'periodo_inicio': periodo_inicio, 'periodo_fim': periodo_fim
+        }]))